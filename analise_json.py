@@ -0,0 +1,313 @@
+import re
+import json
+
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    orjson = None
+    ORJSON_DISPONIVEL = False
+
+# Caracteres que mudam o estado da varredura; o resto do texto é pulado pelo re
+_ESTRUTURAIS = re.compile(r'[{}"\\]')
+_LITERAIS_PYTHON = {"True": "true", "False": "false", "None": "null"}
+_LITERAIS_JSON = {"true", "false", "null", "NaN", "Infinity"}
+_PALAVRA = re.compile(r"\w+")
+# Texto sem aspas como valor: vai até a vírgula que abre o próximo campo, o fim do objeto ou da linha
+_VALOR_SEM_ASPAS = re.compile(r'(?:[^,}\]\n]|,(?!\s*"))*')
+_CHAVE_PENDENTE = re.compile(r',?\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+_decodificador = json.JSONDecoder()
+_decodificador_tolerante = json.JSONDecoder(strict=False)
+
+
+class LeitorJsonIncremental:
+    """Acompanha a resposta em streaming e detecta o primeiro objeto JSON completo.
+
+    Cada pedaço recebido é examinado uma única vez, acompanhando a
+    profundidade de chaves fora de strings. Quando a chave de abertura do
+    objeto de nível superior é fechada e o trecho é um JSON válido, o objeto
+    fica disponível em `objeto` e seu texto em `texto_json`.
+    """
+
+    def __init__(self):
+        self._partes = []
+        self._tamanho = 0
+        self._inicio = -1
+        self._profundidade = 0
+        self._em_string = False
+        self._escape = False
+        self.objeto = None
+        self.texto_json = None
+
+    @property
+    def completo(self) -> bool:
+        return self.objeto is not None
+
+    def texto(self) -> str:
+        """Todo o texto recebido até agora"""
+        return "".join(self._partes)
+
+    def alimentar(self, pedaco: str):
+        """Acrescenta um pedaço da resposta; retorna o objeto assim que ele estiver completo"""
+        if self.completo:
+            return self.objeto
+
+        base = self._tamanho
+        self._partes.append(pedaco)
+        self._tamanho += len(pedaco)
+
+        for i, c in enumerate(pedaco, start=base):
+            if self._inicio < 0:
+                if c == "{":
+                    self._inicio = i
+                    self._profundidade = 1
+                continue
+
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._em_string = False
+            elif c == '"':
+                self._em_string = True
+            elif c == "{":
+                self._profundidade += 1
+            elif c == "}":
+                self._profundidade -= 1
+                if self._profundidade == 0:
+                    trecho = self.texto()[self._inicio:i + 1]
+                    try:
+                        self.objeto = carregar_json(trecho)
+                        self.texto_json = trecho
+                        return self.objeto
+                    except ValueError:
+                        # Chaves equilibradas mas JSON inválido: procura o próximo objeto
+                        self._inicio = -1
+
+        return None
+
+
+def carregar_json(texto: str, rapido: bool = True):
+    """json.loads, com o orjson quando ele estiver instalado e `rapido` for True"""
+    if rapido and orjson is not None:
+        return orjson.loads(texto)
+    return json.loads(texto)
+
+
+def localizar_objetos(texto: str):
+    """Trechos (início, fim) dos objetos JSON de nível superior do texto, em uma única passada
+
+    Acompanha strings e escapes para ignorar chaves dentro de textos; o que
+    vem antes, entre e depois dos objetos (cercas ```json, comentários do
+    modelo) é ignorado. Um objeto que não fecha (resposta cortada) sai por
+    último como (início, None).
+    """
+    abertura = -1
+    profundidade = 0
+    em_string = False
+    escapado = -1
+    for m in _ESTRUTURAIS.finditer(texto):
+        i = m.start()
+        if i == escapado:
+            continue
+        c = texto[i]
+        if em_string:
+            if c == "\\":
+                escapado = i + 1
+            elif c == '"':
+                em_string = False
+        elif abertura < 0:
+            if c == "{":
+                abertura = i
+                profundidade = 1
+        elif c == '"':
+            em_string = True
+        elif c == "{":
+            profundidade += 1
+        elif c == "}":
+            profundidade -= 1
+            if profundidade == 0:
+                yield abertura, i + 1
+                abertura = -1
+    if abertura >= 0:
+        yield abertura, None
+
+
+def reparar_json(trecho: str) -> tuple:
+    """Corrige defeitos comuns de JSON gerado por LLM; retorna (texto, correções aplicadas)
+
+    Correções: vírgula antes de } ou ], True/False/None do Python, quebras
+    de linha e tabulações cruas dentro de strings, texto sem aspas como valor
+    ("justificativa": ótimo texto) e, se o trecho foi cortado,
+    fechamento da string e das chaves e colchetes abertos ("corte"), sem a
+    chave que ficou sem valor. "campo_cortado" indica que o último campo do
+    objeto de nível superior ficou incompleto (texto, número ou objeto
+    interrompido no meio).
+    """
+    saida = []
+    correcoes = set()
+    pilha = []
+    em_string = False
+    escape = False
+    valor_no_corte = False
+    i = 0
+    n = len(trecho)
+    while i < n:
+        c = trecho[i]
+        if em_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                em_string = False
+            elif c in "\n\r\t":
+                c = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}[c]
+                correcoes.add("controle_em_string")
+            saida.append(c)
+            i += 1
+            continue
+
+        if c == '"':
+            em_string = True
+        elif c in "{[":
+            pilha.append("}" if c == "{" else "]")
+        elif c in "}]":
+            while saida and saida[-1].isspace():
+                saida.pop()
+            if saida and saida[-1] == ",":
+                saida.pop()
+                correcoes.add("virgula_final")
+            if pilha:
+                pilha.pop()
+        elif c.isalpha():
+            palavra = _PALAVRA.match(trecho, i).group()
+            if palavra in _LITERAIS_PYTHON:
+                saida.append(_LITERAIS_PYTHON[palavra])
+                correcoes.add("literal_python")
+                i += len(palavra)
+                continue
+            if palavra in _LITERAIS_JSON:
+                saida.append(palavra)
+                i += len(palavra)
+                continue
+            k = len(saida) - 1
+            while k >= 0 and saida[k].isspace():
+                k -= 1
+            if k >= 0 and saida[k] == ":":
+                valor = _VALOR_SEM_ASPAS.match(trecho, i).group()
+                saida.append(json.dumps(valor.rstrip(), ensure_ascii=False))
+                correcoes.add("texto_sem_aspas")
+                i += len(valor)
+                valor_no_corte = i >= n
+                continue
+        saida.append(c)
+        i += 1
+
+    if em_string or pilha:
+        correcoes.add("corte")
+        if escape:
+            saida.pop()
+        if em_string:
+            saida.append('"')
+        texto = "".join(saida).rstrip()
+        # Chave sem valor (ou string de chave) no ponto do corte, e vírgula solta
+        chave_removida = texto.endswith(":") or (
+            em_string and not re.search(r':\s*"(?:[^"\\]|\\.)*"$', texto)
+        )
+        if chave_removida:
+            texto = _CHAVE_PENDENTE.sub("", texto).rstrip()
+        completo = len(pilha) == 1 and not valor_no_corte and (
+            chave_removida or (not em_string and texto.endswith((",", "}", "]", '"')))
+        )
+        if not completo:
+            correcoes.add("campo_cortado")
+        texto = texto.rstrip(",")
+        return texto + "".join(reversed(pilha)), sorted(correcoes)
+    return "".join(saida), sorted(correcoes)
+
+
+def analisar_resposta(texto: str, tolerante: bool = True, rapido: bool = True) -> tuple:
+    """(objeto, correções) do primeiro objeto JSON da resposta; (None, []) se nenhum puder ser lido
+
+    Nunca levanta exceção: qualquer texto que não dê um objeto vira (None, []).
+
+    No caso comum (só o objeto, ou o objeto seguido de texto) a leitura é
+    feita direto pelo decodificador em C. Senão, os objetos fechados
+    encontrados por localizar_objetos são lidos um a um; só se nenhum for
+    válido, e com `tolerante`, passam por reparar_json (incluindo um objeto
+    cortado no fim).
+    """
+    inicio = texto.find("{") if texto else -1
+    if inicio < 0:
+        return None, []
+    trecho = texto[inicio:].rstrip()
+    try:
+        if trecho.endswith("}"):
+            objeto = carregar_json(trecho, rapido)
+        else:
+            objeto = _decodificador.raw_decode(texto, inicio)[0]
+        if isinstance(objeto, dict):
+            return objeto, []
+    except (ValueError, RecursionError):
+        pass
+
+    candidatos = []
+    for inicio, fim in localizar_objetos(texto):
+        trecho = texto[inicio:fim]
+        if fim is not None:
+            try:
+                objeto = carregar_json(trecho, rapido)
+                if isinstance(objeto, dict):
+                    return objeto, []
+            except (ValueError, RecursionError):
+                pass
+        candidatos.append(trecho)
+
+    if tolerante:
+        for trecho in candidatos:
+            try:
+                reparado, correcoes = reparar_json(trecho)
+                objeto = json.loads(reparado, strict=False)
+            except Exception:
+                # Uma resposta que nem a correção entende não pode derrubar a avaliação
+                continue
+            if isinstance(objeto, dict):
+                return objeto, correcoes
+    return None, []
+
+
+def extrair_objeto(texto: str, tolerante: bool = True, rapido: bool = True) -> dict:
+    """Primeiro objeto JSON da resposta do modelo, ou None"""
+    return analisar_resposta(texto, tolerante, rapido)[0]
+
+
+def extrair_campos(texto: str, campos) -> dict:
+    """Campos do objeto JSON da resposta que chegaram completos, mesmo com o objeto cortado
+
+    Num objeto cortado, o último campo, se ficou incompleto, é descartado.
+    Se nem a correção salva o objeto, cada campo é procurado no texto e
+    decodificado isoladamente.
+    """
+    objeto, correcoes = analisar_resposta(texto)
+    if objeto is not None:
+        chaves = list(objeto)
+        if "campo_cortado" in correcoes and chaves:
+            chaves.pop()
+        return {c: objeto[c] for c in campos if c in chaves}
+
+    encontrados = {}
+    for campo in campos:
+        if not texto:
+            break
+        m = re.search(rf'"{re.escape(campo)}"\s*:\s*', texto)
+        if m is None:
+            continue
+        try:
+            encontrados[campo], _ = _decodificador_tolerante.raw_decode(texto, m.end())
+        except ValueError:
+            pass
+    return encontrados
@@ -0,0 +1,171 @@
+import re
+import csv
+import json
+import time
+import random
+from pathlib import Path
+
+from analise_json import extrair_objeto, analisar_resposta, ORJSON_DISPONIVEL
+
+# Mede a análise das respostas brutas do modelo: a forma antiga de cada script
+# contra o analise_json, com e sem correções e com os dois backends de JSON.
+
+# --- CONFIGURAÇÕES ---
+# Respostas salvas pelo unicoagente: um JSON por redação (execuções antigas) e o JSONL atual
+PASTA_RESULTADOS_LEGADO = Path("resultados_json_OFICIAL")
+ARQUIVO_JSONL = Path("resultados_uni_agente.jsonl")
+# Sem respostas salvas, usa um corpus sintético com os defeitos mais comuns
+TAMANHO_CORPUS_SINTETICO = 5000
+REPETICOES = 5
+SEMENTE = 42
+ARQUIVO_RESULTADOS = "benchmark_analise_json.csv"
+
+PALAVRAS = (
+    "o texto apresenta domínio adequado da norma culta com poucos desvios e "
+    "repertório sociocultural pertinente ao tema mas a proposta de intervenção "
+    "carece de detalhamento do agente e do meio de execução"
+).split()
+
+
+def regex_guloso(texto: str):
+    """Como o unicoagente extraía o JSON antes"""
+    match = re.search(r"\{.*\}", texto, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group())
+    except ValueError:
+        return None
+
+
+def cercas(texto: str):
+    """Como o multi_agentes_batch extraía o JSON antes (remove a primeira e a última linha da cerca)"""
+    texto = texto.strip()
+    if texto.startswith("```"):
+        texto = "\n".join(texto.split("\n")[1:-1])
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return None
+
+
+ANALISADORES = {
+    "regex guloso (antigo uni)": regex_guloso,
+    "cercas + json.loads (antigo multi)": cercas,
+    "analise_json estrito, json": lambda t: extrair_objeto(t, tolerante=False, rapido=False),
+    "analise_json tolerante, json": lambda t: extrair_objeto(t, rapido=False),
+}
+if ORJSON_DISPONIVEL:
+    ANALISADORES["analise_json estrito, orjson"] = lambda t: extrair_objeto(t, tolerante=False)
+    ANALISADORES["analise_json tolerante, orjson"] = extrair_objeto
+
+
+def carregar_corpus() -> tuple:
+    """Respostas brutas salvas e a origem delas"""
+    respostas = []
+    if PASTA_RESULTADOS_LEGADO.is_dir():
+        for caminho in sorted(PASTA_RESULTADOS_LEGADO.glob("*.json")):
+            with open(caminho, encoding="utf-8") as f:
+                respostas.append(json.load(f).get("resposta_bruta") or "")
+    if ARQUIVO_JSONL.exists():
+        with open(ARQUIVO_JSONL, encoding="utf-8") as f:
+            respostas += [json.loads(linha).get("resposta_bruta") or "" for linha in f if linha.strip()]
+    if respostas:
+        return respostas, f"{PASTA_RESULTADOS_LEGADO}/ e {ARQUIVO_JSONL}"
+    return corpus_sintetico(TAMANHO_CORPUS_SINTETICO), "corpus sintético"
+
+
+def corpus_sintetico(n: int) -> list:
+    """Respostas no formato do unicoagente, metade com algum defeito comum de LLM"""
+    rng = random.Random(SEMENTE)
+
+    def frase(k):
+        return " ".join(rng.choices(PALAVRAS, k=k))
+
+    defeitos = [
+        lambda t: f"```json\n{t}\n```",
+        lambda t: f"Segue a avaliação:\n{t}\n\nObservação: {{nota}} considera a TRI. {frase(120)}",
+        lambda t: t[:rng.randint(len(t) // 3, len(t) - 2)],
+        lambda t: t.replace('"\n}', '",\n}', 1),
+        lambda t: t.replace('"nota_final"', '"revisado": True,\n  "nota_final"', 1),
+        lambda t: t.replace(". ", ".\n", 1),
+        lambda t: re.sub(r'"justificativa": "([^"]*)"', r'"justificativa": \1', t, count=1),
+    ]
+    respostas = []
+    for _ in range(n):
+        avaliacao = {
+            **{f"competencia_{i}": {"nota": rng.randrange(0, 201, 40), "justificativa": frase(rng.randint(30, 90))}
+               for i in range(1, 6)},
+            "nota_final": rng.randrange(0, 1001, 40),
+            "diagnostico_geral": frase(rng.randint(40, 120)).replace(" e ", ". E ", 1),
+        }
+        texto = json.dumps(avaliacao, ensure_ascii=False, indent=2)
+        respostas.append(rng.choice(defeitos)(texto) if rng.random() < 0.5 else texto)
+    return respostas
+
+
+def eh_json_puro(texto: str) -> bool:
+    try:
+        return isinstance(json.loads(texto), dict)
+    except ValueError:
+        return False
+
+
+def medir(nome: str, grupo: str, analisar, respostas: list) -> dict:
+    total_mb = sum(len(t.encode("utf-8")) for t in respostas) / 1024 ** 2
+    melhor = float("inf")
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultados = [analisar(t) for t in respostas]
+        melhor = min(melhor, time.perf_counter() - inicio)
+    recuperadas = sum(1 for r in resultados if isinstance(r, dict))
+    return {
+        "analisador": nome,
+        "grupo": grupo,
+        "respostas": len(respostas),
+        "respostas_s": round(len(respostas) / melhor),
+        "mb_s": round(total_mb / melhor, 1),
+        "recuperadas": recuperadas,
+        "taxa_recuperacao": round(recuperadas / len(respostas) * 100, 1),
+    }
+
+
+def main():
+    respostas, origem = carregar_corpus()
+    total_mb = sum(len(t.encode("utf-8")) for t in respostas) / 1024 ** 2
+    print(f"{len(respostas)} respostas ({total_mb:.1f} MB) de {origem}; orjson: "
+          f"{'sim' if ORJSON_DISPONIVEL else 'não instalado'}\n")
+
+    # Respostas que já são um JSON puro medem o caminho comum; as demais, a recuperação
+    grupos = {"todas": respostas, "JSON puro": [], "com defeito": []}
+    for texto in respostas:
+        grupos["JSON puro" if eh_json_puro(texto) else "com defeito"].append(texto)
+    resultados = []
+    for grupo, textos in grupos.items():
+        if not textos:
+            continue
+        print(f"{grupo} ({len(textos)} respostas):")
+        for nome, analisar in ANALISADORES.items():
+            r = medir(nome, grupo, analisar, textos)
+            resultados.append(r)
+            print(f"  {nome:>36} | {r['respostas_s']:>8} respostas/s | {r['mb_s']:>7.1f} MB/s | "
+                  f"{r['recuperadas']:>6} recuperadas ({r['taxa_recuperacao']:.1f}%)")
+
+    # Quais correções o modo tolerante precisou aplicar
+    correcoes = {}
+    for texto in respostas:
+        for c in analisar_resposta(texto)[1]:
+            correcoes[c] = correcoes.get(c, 0) + 1
+    if correcoes:
+        print("\nCorreções do modo tolerante: "
+              + ", ".join(f"{c} ({n})" for c, n in sorted(correcoes.items(), key=lambda x: -x[1])))
+
+    with open(ARQUIVO_RESULTADOS, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(resultados[0]))
+        writer.writeheader()
+        writer.writerows(resultados)
+    print(f"\nResultados gravados em {ARQUIVO_RESULTADOS}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import sys
+import json
+import time
+import random
+import resource
+import subprocess
+from pathlib import Path
+
+from carregador_redacoes import iterar_redacoes_tema, amostra_reservatorio
+
+# --- CONFIGURAÇÕES ---
+PASTA_CORPUS = Path("corpus_sintetico")
+TAMANHO_CORPUS_GB = 2.0
+NUM_ARQUIVOS = 8
+NUM_REDACOES = 200
+SEMENTE = 42
+
+PALAVRAS = (
+    "a educação é um direito de todos e dever do estado sociedade brasileira "
+    "desafios para a formação cidadã no brasil contemporâneo proposta de intervenção"
+).split()
+
+
+def gerar_corpus(pasta: Path, tamanho_gb: float, num_arquivos: int):
+    """Gera arquivos tema-*.json com redações sintéticas até somar ~tamanho_gb"""
+    pasta.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(SEMENTE)
+    bytes_por_arquivo = tamanho_gb * 1024 ** 3 / num_arquivos
+    proximo_id = 0
+
+    for n in range(num_arquivos):
+        with open(pasta / f"tema-{n:03d}.json", "w", encoding="utf-8") as f:
+            f.write("[\n")
+            escritos = 0
+            while escritos < bytes_por_arquivo:
+                redacao = {
+                    "id": proximo_id,
+                    "tema": f"Tema sintético {n}",
+                    "texto": " ".join(rng.choices(PALAVRAS, k=450)),
+                    "nota": str(rng.randrange(0, 1001, 40)),
+                    "competencias": [
+                        {"competencia": f"Competência {c}", "nota": str(rng.randrange(0, 201, 40))}
+                        for c in range(1, 6)
+                    ],
+                }
+                linha = ("" if escritos == 0 else ",\n") + json.dumps(redacao, ensure_ascii=False)
+                f.write(linha)
+                escritos += len(linha.encode("utf-8"))
+                proximo_id += 1
+            f.write("\n]\n")
+        print(f"  tema-{n:03d}.json: {escritos / 1024 ** 2:.0f} MB")
+
+
+def medir(metodo: str, pasta: Path):
+    """Sorteia a amostra com um método e imprime tempo e pico de memória em JSON"""
+    inicio = time.perf_counter()
+    if metodo == "streaming":
+        amostra, total = amostra_reservatorio(iterar_redacoes_tema(pasta), NUM_REDACOES, SEMENTE)
+    else:
+        # Como era antes: todos os arquivos em memória e depois random.sample
+        todas = []
+        for arquivo in sorted(pasta.glob("tema-*.json")):
+            with open(arquivo, "r", encoding="utf-8") as f:
+                redacoes = json.load(f)
+            for redacao in redacoes:
+                redacao["arquivo_origem"] = arquivo.name
+            todas.extend(redacoes)
+        amostra = random.Random(SEMENTE).sample(todas, min(NUM_REDACOES, len(todas)))
+        total = len(todas)
+    tempo = time.perf_counter() - inicio
+
+    # ru_maxrss vem em KB no Linux
+    pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"metodo": metodo, "total": total, "amostra": len(amostra),
+                      "tempo_s": tempo, "pico_rss_mb": pico_mb}))
+
+
+def main():
+    if not any(PASTA_CORPUS.glob("tema-*.json")):
+        print(f"Gerando corpus sintético de {TAMANHO_CORPUS_GB} GB em {PASTA_CORPUS}...")
+        gerar_corpus(PASTA_CORPUS, TAMANHO_CORPUS_GB, NUM_ARQUIVOS)
+
+    tamanho = sum(a.stat().st_size for a in PASTA_CORPUS.glob("tema-*.json"))
+    print(f"\nCorpus: {tamanho / 1024 ** 3:.2f} GB em {PASTA_CORPUS}")
+
+    # Cada método roda em um processo separado para que o pico de memória não se misture
+    for metodo in ("streaming", "completo"):
+        processo = subprocess.run(
+            [sys.executable, __file__, "--medir", metodo, str(PASTA_CORPUS)],
+            capture_output=True, text=True,
+        )
+        linhas = processo.stdout.strip().splitlines()
+        if processo.returncode != 0 or not linhas:
+            print(f"{metodo:>10}: falhou (código {processo.returncode}) {processo.stderr.strip()[-200:]}")
+            continue
+        r = json.loads(linhas[-1])
+        print(
+            f"{r['metodo']:>10}: amostra de {r['amostra']} entre {r['total']} redações em "
+            f"{r['tempo_s']:.1f} s, pico de RSS {r['pico_rss_mb']:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "--medir":
+        medir(sys.argv[2], Path(sys.argv[3]))
+    else:
+        if len(sys.argv) > 1:
+            TAMANHO_CORPUS_GB = float(sys.argv[1])
+        main()
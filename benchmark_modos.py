@@ -0,0 +1,73 @@
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import multi_agentes_batch as multi
+import config_avaliacao as config
+from cliente_ollama import ClienteOllama
+
+# --- CONFIGURAÇÕES ---
+PASTA_CONJUNTO = Path("codigo/conjunto_1/conjunto_1")
+NUM_REDACOES = 10
+SEMENTE = 42
+
+MODOS = {
+    "independente": multi.avaliar_redacao,
+    "sessao": multi.avaliar_redacao_sessao,
+}
+
+
+async def medir_modo(nome: str, avaliar, redacoes: list) -> dict:
+    """Avalia as redações uma a uma em um modo e devolve tempos e contagens de prompt"""
+    # Sem cache, para que os dois modos de fato chamem o modelo
+    async with ClienteOllama(config.OLLAMA_URLS, max_simultaneas=config.MAX_REQUISICOES_OLLAMA) as cliente:
+        tempos = []
+        for redacao in redacoes:
+            inicio = time.perf_counter()
+            await avaliar(cliente, redacao['texto'], redacao['tema'], redacao.get('id', 'N/A'))
+            tempos.append(time.perf_counter() - inicio)
+
+        chamadas = sum(t['chamadas'] for t in cliente.tempos_prompt.values())
+        com_prompt_eval = sum(t['com_prompt_eval'] for t in cliente.tempos_prompt.values())
+        return {
+            "modo": nome,
+            "redacoes": len(redacoes),
+            "segundos_por_redacao": sum(tempos) / len(tempos),
+            "tokens_prompt_por_redacao": sum(t['prompt_eval_count'] for t in cliente.tempos_prompt.values()) / len(redacoes),
+            "prompt_eval_ms_por_chamada": (
+                sum(t['prompt_eval_ns'] for t in cliente.tempos_prompt.values()) / 1e6 / com_prompt_eval
+                if com_prompt_eval else 0.0
+            ),
+            "ttft_ms_por_chamada": sum(t['ttft_s'] for t in cliente.tempos_prompt.values()) * 1000 / max(chamadas, 1),
+        }
+
+
+async def main():
+    if not PASTA_CONJUNTO.exists():
+        print(f" Pasta não encontrada: {PASTA_CONJUNTO}")
+        return
+
+    redacoes = multi.carregar_redacoes(PASTA_CONJUNTO, NUM_REDACOES, SEMENTE)
+
+    resultados = []
+    for nome, avaliar in MODOS.items():
+        print(f"\n=== Modo {nome} ===")
+        resultados.append(await medir_modo(nome, avaliar, redacoes))
+
+    print("\n" + "=" * 80)
+    print(f"COMPARAÇÃO DE MODOS ({multi.MODEL_NAME}, {len(redacoes)} redações, uma por vez)")
+    print("=" * 80)
+    for r in resultados:
+        print(
+            f"{r['modo']:>12}: {r['segundos_por_redacao']:.1f} s/redação, "
+            f"{r['tokens_prompt_por_redacao']:.0f} tokens de prompt processados/redação, "
+            f"prompt_eval {r['prompt_eval_ms_por_chamada']:.0f} ms/chamada, "
+            f"1º token {r['ttft_ms_por_chamada']:.0f} ms/chamada"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        NUM_REDACOES = int(sys.argv[1])
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+import os
+import sys
+import csv
+import time
+import random
+import socket
+import asyncio
+import tempfile
+import contextlib
+import subprocess
+
+import multi_agentes_batch as multi
+import unicoagente as uni
+from cliente_ollama import ClienteOllama
+from motor_avaliacao import MotorAvaliacao, AgendadorPorRedacao, percentil
+from destinos_resultado import DestinoJSONL
+
+# Mede a vazão da camada de orquestração (cliente, motor, análise das respostas
+# e destinos) contra o servidor_simulado.py, sem GPU e sem modelo.
+
+# --- CONFIGURAÇÕES ---
+PORTA_SIMULADOR = 11500
+SIMULACAO = {
+    "tokens_por_s": 200.0,
+    "ttft": 0.05,
+    "taxa_erro": 0.0,
+    "taxa_json_invalido": 0.0,
+    "slots": 8,
+    "taxa_lenta": 0.0,
+    "fator_lento": 20.0,
+}
+ESTRATEGIAS = ["multi", "uni"]
+NIVEIS_CONCORRENCIA = [1, 4, 8]
+QUANTIDADES_REDACOES = [10, 40]
+MAX_REQUISICOES_OLLAMA = 8
+# Teto do limite adaptativo por servidor (None = limite fixo em MAX_REQUISICOES_OLLAMA)
+MAX_REQUISICOES_OLLAMA_ADAPTATIVO = None
+# Hedge no percentil das durações por agente (None desliga); com taxa_lenta > 0
+# na simulação, mostra quanto da cauda de latência ele corta
+PERCENTIL_HEDGE = None
+TAXA_MAXIMA_HEDGE = 0.1
+SEMENTE = 42
+ARQUIVO_RESULTADOS = "benchmark_orquestracao.csv"
+
+COMPETENCIAS_DATASET = [
+    "Demonstrar domínio da modalidade escrita formal da Língua Portuguesa",
+    "Compreender a proposta de redação",
+    "Selecionar, relacionar, organizar e interpretar informações",
+    "Demonstrar conhecimento dos mecanismos linguísticos",
+    "Elaborar proposta de intervenção para o problema abordado",
+]
+
+
+def redacoes_sinteticas(n: int, semente: int) -> list:
+    """Redações no formato dos arquivos tema-*.json"""
+    rng = random.Random(semente)
+    palavras = "a sociedade brasileira enfrenta desafios na educação e na saúde pública".split()
+    return [
+        {
+            "id": str(i),
+            "tema": f"Tema sintético {i % 5}",
+            "texto": " ".join(rng.choices(palavras, k=rng.randint(250, 450))),
+            "nota": "600",
+            "competencias": [{"competencia": c, "nota": "120"} for c in COMPETENCIAS_DATASET],
+            "arquivo_origem": "sintetico.json",
+        }
+        for i in range(n)
+    ]
+
+
+def iniciar_simulador(porta: int = PORTA_SIMULADOR, simulacao: dict = None) -> subprocess.Popen:
+    """Sobe o simulador em outro processo, para não somar a CPU dele à do cliente"""
+    argumentos = [sys.executable, "servidor_simulado.py", "--porta", str(porta), "--semente", str(SEMENTE)]
+    for nome, valor in (SIMULACAO if simulacao is None else simulacao).items():
+        argumentos += [f"--{nome.replace('_', '-')}", str(valor)]
+    processo = subprocess.Popen(argumentos, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", porta), timeout=0.1):
+            return processo
+        time.sleep(0.05)
+    processo.kill()
+    raise RuntimeError("o servidor simulado não respondeu")
+
+
+async def medir(nome: str, redacoes: list, num_workers: int, pasta: str) -> dict:
+    """Roda uma estratégia de ponta a ponta e mede vazão, latência e CPU do cliente"""
+    if nome == "multi":
+        estrategia = multi.EstrategiaMultiAgente("independente")
+        max_tentativas = 1
+    else:
+        estrategia = uni.EstrategiaUniAgente()
+        redacoes = [uni.preparar_entrada(r) for r in redacoes]
+        max_tentativas = uni.MAX_TENTATIVAS
+
+    async with ClienteOllama(f"http://127.0.0.1:{PORTA_SIMULADOR}", max_simultaneas=MAX_REQUISICOES_OLLAMA,
+                             max_simultaneas_adaptativo=MAX_REQUISICOES_OLLAMA_ADAPTATIVO,
+                             percentil_hedge=PERCENTIL_HEDGE, taxa_maxima_hedge=TAXA_MAXIMA_HEDGE) as cliente:
+        destino = DestinoJSONL(os.path.join(pasta, f"{nome}_{num_workers}_{len(redacoes)}.jsonl"))
+        motor = MotorAvaliacao(estrategia, cliente, [destino], AgendadorPorRedacao(num_workers),
+                               max_tentativas=max_tentativas, espera_base=0.05, espera_maxima=0.5)
+
+        # A saída de progresso do motor faz parte do custo, mas não precisa aparecer
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            cpu = time.process_time()
+            inicio = time.perf_counter()
+            await motor.executar(redacoes)
+            duracao = time.perf_counter() - inicio
+            cpu = time.process_time() - cpu
+            motor.fechar()
+        limite = cliente.descrever_limites()
+        hedge = cliente.hedge
+
+    return {
+        "estrategia": nome,
+        "redacoes": len(redacoes),
+        "workers": num_workers,
+        "falhas": motor.falhas,
+        "redacoes_min": round(motor.concluidas / duracao * 60, 1),
+        "p50_s": round(percentil(motor.tempos, 50), 3),
+        "p95_s": round(percentil(motor.tempos, 95), 3),
+        "cpu_cliente_s": round(cpu, 3),
+        "cpu_ms_por_redacao": round(cpu / len(redacoes) * 1000, 2),
+        "cpu_percentual": round(cpu / duracao * 100, 1),
+        "limite_final": limite,
+        "hedges": hedge["disparados"],
+        "hedges_vencidos": hedge["copia_venceu"],
+        "economia_hedge_s": round(hedge["economia_s"], 2),
+    }
+
+
+async def main():
+    simulador = iniciar_simulador()
+    resultados = []
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            for n in QUANTIDADES_REDACOES:
+                redacoes = redacoes_sinteticas(n, SEMENTE)
+                for nome in ESTRATEGIAS:
+                    for num_workers in NIVEIS_CONCORRENCIA:
+                        r = await medir(nome, redacoes, num_workers, pasta)
+                        resultados.append(r)
+                        print(
+                            f"{r['estrategia']:>5} | {r['redacoes']:>4} redações | {r['workers']:>2} workers | "
+                            f"{r['redacoes_min']:>8.1f} redações/min | p50 {r['p50_s']:.2f} s | "
+                            f"p95 {r['p95_s']:.2f} s | CPU {r['cpu_ms_por_redacao']:.1f} ms/redação "
+                            f"({r['cpu_percentual']:.0f}%) | {r['falhas']} falhas | {r['limite_final']} | "
+                            f"{r['hedges']} hedges"
+                        )
+    finally:
+        simulador.terminate()
+        simulador.wait()
+
+    with open(ARQUIVO_RESULTADOS, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(resultados[0]))
+        writer.writeheader()
+        writer.writerows(resultados)
+    print(f"\nResultados gravados em {ARQUIVO_RESULTADOS} (simulação: {SIMULACAO})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+import time
+import asyncio
+
+from cliente_ollama import ClienteOllama
+from metricas_chamadas import MetricasChamadas
+from benchmark_orquestracao import iniciar_simulador
+
+# Verifica o roteamento do ClienteOllama entre vários servidor_simulado.py,
+# cada um em uma porta: distribuição pelo servidor menos ocupado, saída do
+# rodízio de um servidor que cai e volta depois do teste de /api/version, e
+# para onde vão as cópias do hedge. Cada cenário imprime o que mediu e para
+# com AssertionError se o comportamento não for o esperado.
+
+# --- CONFIGURAÇÕES ---
+PORTAS_SIMULADORES = [11510, 11511, 11512]
+SIMULACAO_RAPIDA = {"tokens_por_s": 200.0, "ttft": 0.05, "slots": 4}
+# Mesmo servidor com geração 10x mais lenta, como uma GPU mais fraca ou sobrecarregada
+SIMULACAO_LENTA = {"tokens_por_s": 20.0, "ttft": 0.05, "slots": 4}
+# Gerações travadas de vez em quando, para o hedge ter o que cortar
+SIMULACAO_CAUDA = {"tokens_por_s": 200.0, "ttft": 0.05, "slots": 4, "taxa_lenta": 0.1, "fator_lento": 20.0}
+MAX_REQUISICOES_OLLAMA = 4
+NUM_WORKERS = 8
+REQUISICOES_POR_CENARIO = 80
+MAX_FALHAS = 2
+INTERVALO_TESTE = 0.5
+
+
+def url(porta: int) -> str:
+    return f"http://127.0.0.1:{porta}"
+
+
+async def disparar(cliente: ClienteOllama, n: int, num_workers: int = NUM_WORKERS, inicio_id: int = 0) -> int:
+    """Faz `n` chamadas com `num_workers` em paralelo; retorna quantas deram certo"""
+    fila = asyncio.Queue()
+    for i in range(n):
+        fila.put_nowait(inicio_id + i)
+    sucessos = 0
+
+    async def worker():
+        nonlocal sucessos
+        while not fila.empty():
+            redacao_id = fila.get_nowait()
+            ok, _ = await cliente.gerar(
+                "simulado", f"Avalie a redação {redacao_id}.", parar_em_json=True, rotulo="C1",
+                redacao_id=redacao_id, options={"num_predict": 256},
+            )
+            sucessos += ok
+
+    await asyncio.gather(*(worker() for _ in range(num_workers)))
+    return sucessos
+
+
+def requisicoes(cliente: ClienteOllama) -> dict:
+    return {b.url: b.requisicoes for b in cliente.backends}
+
+
+async def cenario_distribuicao():
+    """Dois servidores rápidos e um lento: o lento fica com menos requisições"""
+    rapidos, lenta = PORTAS_SIMULADORES[:2], PORTAS_SIMULADORES[2]
+    processos = [iniciar_simulador(p, SIMULACAO_RAPIDA) for p in rapidos] + [iniciar_simulador(lenta, SIMULACAO_LENTA)]
+    try:
+        async with ClienteOllama([url(p) for p in PORTAS_SIMULADORES],
+                                 max_simultaneas=MAX_REQUISICOES_OLLAMA) as cliente:
+            sucessos = await disparar(cliente, REQUISICOES_POR_CENARIO)
+            contagem = requisicoes(cliente)
+    finally:
+        for processo in processos:
+            processo.terminate()
+            processo.wait()
+
+    print(f"Distribuição: {sucessos}/{REQUISICOES_POR_CENARIO} ok; requisições por servidor {contagem}")
+    assert sucessos == REQUISICOES_POR_CENARIO
+    assert all(contagem[url(lenta)] < contagem[url(p)] / 2 for p in rapidos), "o servidor lento não foi evitado"
+
+
+async def cenario_falha_e_recuperacao():
+    """Um servidor cai: sai do rodízio sem perder chamadas, e volta quando sobe de novo"""
+    porta_a, porta_b = PORTAS_SIMULADORES[:2]
+    processo_a = iniciar_simulador(porta_a, SIMULACAO_RAPIDA)
+    processo_b = iniciar_simulador(porta_b, SIMULACAO_RAPIDA)
+    try:
+        async with ClienteOllama([url(porta_a), url(porta_b)], max_simultaneas=MAX_REQUISICOES_OLLAMA,
+                                 max_falhas=MAX_FALHAS, intervalo_teste=INTERVALO_TESTE) as cliente:
+            a, b = cliente.backends
+            processo_b.terminate()
+            processo_b.wait()
+
+            # Fora do ar: as chamadas que caírem nele são refeitas no outro
+            sucessos = await disparar(cliente, REQUISICOES_POR_CENARIO // 2)
+            print(f"Servidor B fora do ar: {sucessos} ok; B saudável={b.saudavel}, {b.falhas} falhas, "
+                  f"requisições {requisicoes(cliente)}")
+            assert sucessos == REQUISICOES_POR_CENARIO // 2
+            assert not b.saudavel and b.falhas >= MAX_FALHAS, "o servidor fora do ar continuou no rodízio"
+
+            # O teste periódico de /api/version falha enquanto ele estiver fora do ar
+            requisicoes_b, proximo_teste = b.requisicoes, b.proximo_teste
+            await asyncio.sleep(INTERVALO_TESTE * 1.5)
+            await disparar(cliente, NUM_WORKERS)
+            await asyncio.sleep(0.2)
+            assert b.proximo_teste > proximo_teste, "o servidor fora do ar não foi testado de novo"
+            assert not b.saudavel and b.requisicoes == requisicoes_b, "o servidor voltou ao rodízio ainda fora do ar"
+
+            processo_b = iniciar_simulador(porta_b, SIMULACAO_RAPIDA)
+            await asyncio.sleep(INTERVALO_TESTE * 1.5)
+            antes = b.requisicoes
+            sucessos = await disparar(cliente, REQUISICOES_POR_CENARIO // 2, inicio_id=REQUISICOES_POR_CENARIO)
+            print(f"Servidor B de volta: {sucessos} ok; B saudável={b.saudavel}, "
+                  f"{b.requisicoes - antes} novas requisições; requisições {requisicoes(cliente)}")
+            assert b.saudavel, "o servidor não voltou ao rodízio"
+            assert b.requisicoes - antes >= REQUISICOES_POR_CENARIO // 8, "o servidor voltou mas não recebeu carga"
+    finally:
+        for processo in (processo_a, processo_b):
+            processo.terminate()
+            processo.wait()
+
+
+async def cenario_hedge():
+    """As cópias do hedge vão para o outro servidor, e nunca para um fora do rodízio ou sem vaga"""
+    portas = PORTAS_SIMULADORES[:2]
+    processos = [iniciar_simulador(p, SIMULACAO_CAUDA) for p in portas]
+    metricas = MetricasChamadas()
+    try:
+        async with ClienteOllama([url(p) for p in portas], max_simultaneas=MAX_REQUISICOES_OLLAMA,
+                                 max_falhas=MAX_FALHAS, metricas=metricas,
+                                 percentil_hedge=90, taxa_maxima_hedge=0.2) as cliente:
+            inicio = time.perf_counter()
+            sucessos = await disparar(cliente, REQUISICOES_POR_CENARIO * 2, num_workers=4)
+            duracao = time.perf_counter() - inicio
+
+            originais = {r["redacao_id"]: r["servidor"] for r in metricas.registros
+                         if r.get("hedge") in ("original", "original_cancelada")}
+            copias = [r for r in metricas.registros if r.get("hedge") in ("copia", "copia_cancelada")]
+            mesmo_servidor = sum(r["servidor"] == originais.get(r["redacao_id"]) for r in copias)
+            print(f"Hedge: {sucessos} ok em {duracao:.1f} s; {cliente.hedge['disparados']} cópias, "
+                  f"{cliente.hedge['copia_venceu']} vencedoras, {mesmo_servidor} no mesmo servidor da original")
+            assert cliente.hedge["disparados"] > 0, "nenhuma cópia disparada"
+            assert mesmo_servidor == 0, "cópia enviada ao servidor da original havendo outro livre"
+
+            # Estados que a carga não garante reproduzir: outro servidor fora do
+            # rodízio ou sem vaga livre
+            a, b = cliente.backends
+            for _ in range(MAX_FALHAS):
+                cliente._registrar_falha(b)
+            assert cliente._escolher_reserva(a, [a]) is a, "cópia enviada a servidor fora do rodízio"
+            a.em_andamento = a.limite.atual
+            assert cliente._escolher_reserva(a, [a]) is None, "cópia disparada sem vaga livre"
+            a.em_andamento = 0
+            cliente._registrar_sucesso(b)
+            b.em_andamento = b.limite.atual
+            assert cliente._escolher_reserva(a, [a]) is None, "cópia enviada a servidor sem vaga livre"
+            b.em_andamento = 0
+            print("Hedge: servidor fora do rodízio ou sem vaga não recebe cópia")
+    finally:
+        for processo in processos:
+            processo.terminate()
+            processo.wait()
+
+
+async def main():
+    await cenario_distribuicao()
+    await cenario_falha_e_recuperacao()
+    await cenario_hedge()
+    print("\nRoteamento entre servidores conforme o esperado")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
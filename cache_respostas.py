@@ -0,0 +1,110 @@
+import json
+import time
+import sqlite3
+import hashlib
+
+
+class CacheRespostas:
+    """Cache persistente (SQLite) das respostas do modelo.
+
+    A chave é o hash do endpoint e do payload da requisição (modelo, system
+    prompt, prompt ou mensagens, opções de geração), então qualquer mudança em
+    um prompt ou opção gera uma nova entrada.
+    Quando o tamanho total passa de `max_bytes`, as entradas usadas há mais
+    tempo são removidas (LRU). Com `ignorar=True` o cache não é consultado,
+    mas as novas respostas continuam sendo gravadas.
+    """
+
+    def __init__(self, caminho: str, max_bytes: int = 512 * 1024 * 1024, ignorar: bool = False):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.ignorar = ignorar
+        self.acertos = 0
+        self.faltas = 0
+        self.removidas = 0
+
+        self._conn = sqlite3.connect(caminho)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                resposta TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                ultimo_acesso REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acesso ON respostas(ultimo_acesso)")
+        self._conn.commit()
+        self._tamanho_total = self._conn.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM respostas"
+        ).fetchone()[0]
+
+    @staticmethod
+    def chave(payload: dict) -> str:
+        """Hash do conteúdo da requisição (ignora o campo stream)"""
+        conteudo = {k: v for k, v in payload.items() if k != "stream"}
+        serializado = json.dumps(conteudo, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str):
+        """Retorna a resposta guardada ou None"""
+        if self.ignorar:
+            self.faltas += 1
+            return None
+
+        linha = self._conn.execute(
+            "SELECT resposta FROM respostas WHERE chave = ?", (chave,)
+        ).fetchone()
+        if linha is None:
+            self.faltas += 1
+            return None
+
+        self.acertos += 1
+        self._conn.execute(
+            "UPDATE respostas SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave)
+        )
+        self._conn.commit()
+        return linha[0]
+
+    def guardar(self, chave: str, resposta: str):
+        tamanho = len(resposta.encode("utf-8"))
+        anterior = self._conn.execute(
+            "SELECT tamanho FROM respostas WHERE chave = ?", (chave,)
+        ).fetchone()
+        if anterior:
+            self._tamanho_total -= anterior[0]
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO respostas (chave, resposta, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?)",
+            (chave, resposta, tamanho, time.time()),
+        )
+        self._tamanho_total += tamanho
+        if self._tamanho_total > self.max_bytes:
+            self._remover_antigas()
+        self._conn.commit()
+
+    def _remover_antigas(self):
+        """Remove as entradas menos usadas até ficar em 90% do limite"""
+        alvo = self.max_bytes * 0.9
+        cursor = self._conn.execute("SELECT chave, tamanho FROM respostas ORDER BY ultimo_acesso")
+        remover = []
+        for chave, tamanho in cursor:
+            if self._tamanho_total <= alvo:
+                break
+            remover.append((chave,))
+            self._tamanho_total -= tamanho
+        self._conn.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+        self.removidas += len(remover)
+
+    def fechar(self):
+        self._conn.close()
+
+    def resumo(self) -> str:
+        total = self.acertos + self.faltas
+        taxa = self.acertos / total * 100 if total else 0.0
+        return (
+            f"Cache de respostas ({self.caminho}): {self.acertos} acertos, {self.faltas} faltas "
+            f"({taxa:.1f}% de acerto), {self.removidas} removidas, "
+            f"{self._tamanho_total / 1024 / 1024:.1f} MB em uso"
+        )
@@ -0,0 +1,91 @@
+import json
+import random
+from pathlib import Path
+
+TAMANHO_BLOCO_LEITURA = 1 << 20  # 1 MiB
+
+_decodificador = json.JSONDecoder()
+
+
+def iterar_itens_json(caminho, tamanho_bloco: int = TAMANHO_BLOCO_LEITURA):
+    """Percorre os itens de um arquivo JSON cujo conteúdo é uma lista, sem carregá-lo inteiro.
+
+    O arquivo é lido em blocos e cada item é decodificado assim que está
+    completo no buffer, então a memória usada fica limitada ao tamanho do
+    bloco mais o do maior item.
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        buffer = f.read(tamanho_bloco).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{caminho}: o conteúdo não é uma lista JSON")
+        pos = 1
+        fim_arquivo = False
+
+        while True:
+            # Pula espaços e a vírgula entre itens
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+
+            try:
+                item, fim = _decodificador.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                item, fim = None, -1
+
+            # Um item que termina no fim do buffer pode estar incompleto (ex.: número)
+            if fim < 0 or (fim >= len(buffer) and not fim_arquivo):
+                if fim_arquivo:
+                    raise ValueError(f"{caminho}: JSON incompleto ou inválido na posição {pos}")
+                bloco = f.read(tamanho_bloco)
+                fim_arquivo = not bloco
+                buffer = buffer[pos:] + bloco
+                pos = 0
+                continue
+
+            yield item
+            pos = fim
+
+
+def iterar_redacoes_tema(pasta: Path, padrao: str = "tema-*.json"):
+    """Percorre as redações de todos os arquivos `padrao` da pasta, marcando o arquivo de origem"""
+    arquivos_json = sorted(Path(pasta).glob(padrao))
+    print(f"Encontrados {len(arquivos_json)} arquivos JSON")
+
+    for arquivo in arquivos_json:
+        try:
+            for redacao in iterar_itens_json(arquivo):
+                redacao['arquivo_origem'] = arquivo.name
+                yield redacao
+        except Exception as e:
+            print(f"Erro ao carregar {arquivo.name}: {e}")
+
+
+def iterar_redacoes_arquivo(caminho):
+    """Percorre as redações de um único JSON, achatando blocos que sejam listas de redações"""
+    for bloco in iterar_itens_json(caminho):
+        if isinstance(bloco, list):
+            yield from bloco
+        else:
+            yield bloco
+
+
+def amostra_reservatorio(redacoes, num_redacoes: int, semente: int = None) -> tuple:
+    """Amostra aleatória sem reposição de um iterável, em uma passada (algoritmo R).
+
+    Só a amostra fica em memória. Retorna (amostra, total de itens vistos).
+    """
+    rng = random.Random(semente)
+    amostra = []
+    total = 0
+    for redacao in redacoes:
+        if total < num_redacoes:
+            amostra.append(redacao)
+        else:
+            j = rng.randrange(total + 1)
+            if j < num_redacoes:
+                amostra[j] = redacao
+        total += 1
+    return amostra, total
+
@@ -0,0 +1,555 @@
+import json
+import time
+import asyncio
+import httpx
+from collections import deque
+
+from analise_json import LeitorJsonIncremental
+from limite_concorrencia import LimiteAdaptativo
+from construtor_prompt import estimar_tokens_payload
+from motor_avaliacao import percentil
+
+OLLAMA_URL_PADRAO = "http://localhost:11434"
+
+# Pedaços lidos depois do JSON completo antes de fechar o stream (parar_em_json).
+# Com saída estruturada o servidor costuma encerrar logo em seguida, e o último
+# pedaço traz as estatísticas da geração (prompt_eval_duration etc.)
+PEDACOS_APOS_JSON = 4
+
+# Dimensionamento do num_ctx: (prompt estimado + num_predict) x margem, para
+# compensar o erro da estimativa local de tokens. Sem num_predict na
+# requisição, considera NUM_PREDICT_PADRAO tokens de saída.
+MARGEM_NUM_CTX = 1.25
+NUM_PREDICT_PADRAO = 1024
+
+# Hedge: o prazo de cada rótulo só é calculado depois de HEDGE_MIN_AMOSTRAS
+# chamadas concluídas, sobre as últimas HEDGE_JANELA durações
+HEDGE_MIN_AMOSTRAS = 20
+HEDGE_JANELA = 200
+
+
+class Backend:
+    """Estado e contadores de um servidor Ollama do pool"""
+
+    def __init__(self, url: str, max_simultaneas: int, max_simultaneas_adaptativo: int = None):
+        self.url = url.rstrip("/")
+        self.limite = LimiteAdaptativo(
+            max_simultaneas,
+            maximo=max_simultaneas_adaptativo or max_simultaneas,
+            adaptativo=max_simultaneas_adaptativo is not None,
+        )
+        self.em_andamento = 0
+        self.saudavel = True
+        self.falhas_consecutivas = 0
+        self.proximo_teste = 0.0
+        self.testando = False
+        # Contadores de vazão para o resumo da execução
+        self.requisicoes = 0
+        self.falhas = 0
+        self.tokens_gerados = 0
+        self.tempo_ocupado = 0.0
+
+
+class ClienteOllama:
+    """Cliente HTTP compartilhado por todas as chamadas ao Ollama.
+
+    Mantém um único httpx.AsyncClient com conexões keep-alive durante toda a
+    execução e distribui as requisições entre um ou mais servidores Ollama,
+    sempre para o servidor saudável com menos requisições em andamento.
+    Servidores que falham `max_falhas` vezes seguidas saem do rodízio e são
+    testados de novo a cada `intervalo_teste` segundos.
+    Se um CacheRespostas for informado, respostas já geradas são reaproveitadas.
+    Se um MetricasChamadas for informado, cada tentativa é registrada nele.
+    Com `max_simultaneas_adaptativo`, o limite de requisições simultâneas de
+    cada servidor começa em `max_simultaneas` e é ajustado por AIMD até esse
+    teto (ver LimiteAdaptativo); sem ele, o limite é fixo.
+    Com `faixas_num_ctx`, cada requisição leva options.num_ctx na menor faixa
+    que comporta o prompt estimado mais o limite de saída.
+    Com `percentil_hedge`, uma requisição que passa desse percentil das
+    durações já observadas para o seu rótulo ganha uma cópia em outro
+    servidor (ou em outra vaga do mesmo); vale a primeira resposta válida e a
+    outra é cancelada. `taxa_maxima_hedge` limita a fração de chamadas
+    duplicadas.
+    Use com `async with` para garantir o fechamento das conexões.
+    """
+
+    def __init__(
+        self,
+        urls=OLLAMA_URL_PADRAO,
+        max_simultaneas: int = 4,
+        max_conexoes: int = 16,
+        max_keepalive: int = 16,
+        timeout_conexao: float = 10.0,
+        timeout_leitura: float = 300.0,
+        max_falhas: int = 3,
+        intervalo_teste: float = 30.0,
+        cache=None,
+        metricas=None,
+        max_simultaneas_adaptativo: int = None,
+        faixas_num_ctx: list = None,
+        percentil_hedge: float = None,
+        taxa_maxima_hedge: float = 0.1,
+    ):
+        if isinstance(urls, str):
+            urls = [urls]
+        # max_simultaneas vale por servidor
+        self.backends = [Backend(url, max_simultaneas, max_simultaneas_adaptativo) for url in urls]
+        self.max_falhas = max_falhas
+        self.intervalo_teste = intervalo_teste
+        self.cache = cache
+        self.metricas = metricas
+        self.faixas_num_ctx = sorted(faixas_num_ctx) if faixas_num_ctx else None
+        self._num_ctx_por_modelo = {}  # Faixa em uso por modelo (só cresce)
+        # Tempo de processamento do prompt por rótulo (ex.: agente), somado
+        # a partir do último pedaço do stream e do tempo até o primeiro token
+        self.tempos_prompt = {}
+        self.percentil_hedge = percentil_hedge
+        self.taxa_maxima_hedge = taxa_maxima_hedge
+        self._duracoes = {}  # Últimas durações de chamadas concluídas, por rótulo
+        self.hedge = {"chamadas": 0, "disparados": 0, "copia_venceu": 0, "original_venceu": 0,
+                      "travadas": 0, "economia_s": 0.0}
+        self._inicio = time.monotonic()
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_conexoes * len(self.backends),
+                max_keepalive_connections=max_keepalive * len(self.backends),
+                keepalive_expiry=60.0,
+            ),
+            # O timeout de leitura vale entre dois pedaços do stream, então
+            # só estoura se o servidor ficar parado por esse tempo
+            timeout=httpx.Timeout(
+                connect=timeout_conexao,
+                read=timeout_leitura,
+                write=timeout_conexao,
+                pool=None,
+            ),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
+
+    async def fechar(self):
+        """Fecha todas as conexões do pool e o cache"""
+        await self._http.aclose()
+        if self.cache is not None:
+            self.cache.fechar()
+
+    def escolher_url(self) -> str:
+        """URL do servidor que receberia a próxima requisição (para fixar uma sessão)"""
+        return self._escolher_backend().url
+
+    def _escolher_backend(self, excluir=(), preferido: str = None) -> Backend:
+        """Escolhe o servidor saudável com menos requisições em andamento (relativas ao seu limite)
+
+        Se `preferido` for a URL de um servidor saudável, ele é escolhido.
+        """
+        agora = time.monotonic()
+        for b in self.backends:
+            if not b.saudavel and not b.testando and agora >= b.proximo_teste:
+                b.testando = True
+                asyncio.get_running_loop().create_task(self._testar_backend(b))
+
+        candidatos = [b for b in self.backends if b.saudavel and b not in excluir]
+        for b in candidatos:
+            if b.url == preferido:
+                return b
+        if not candidatos:
+            # Nenhum servidor saudável: tenta mesmo assim, a requisição serve de teste
+            candidatos = [b for b in self.backends if b not in excluir] or self.backends
+        return min(candidatos, key=lambda b: b.em_andamento / b.limite.atual)
+
+    def _escolher_reserva(self, backend: Backend, tentados: list) -> Backend:
+        """Servidor para a cópia do hedge, ou None se nenhum tiver vaga livre
+
+        Só servidores saudáveis: o menos ocupado entre os ainda não tentados
+        ou, sem outro, o da própria chamada original, cuja carga o limite
+        (AIMD) já controla. Uma cópia que teria de esperar vaga não é disparada.
+        """
+        candidatos = [b for b in self.backends if b.saudavel and b not in tentados]
+        if not candidatos and backend.saudavel:
+            candidatos = [backend]
+        livres = [b for b in candidatos if b.em_andamento < b.limite.atual]
+        if not livres:
+            return None
+        return min(livres, key=lambda b: b.em_andamento / b.limite.atual)
+
+    async def _testar_backend(self, backend: Backend):
+        """Verifica se um servidor fora do rodízio voltou a responder"""
+        try:
+            response = await self._http.get(f"{backend.url}/api/version")
+            if response.status_code < 500:
+                self._registrar_sucesso(backend)
+                print(f"   ✔ Servidor {backend.url} voltou ao rodízio")
+                return
+        except httpx.HTTPError:
+            pass
+        finally:
+            backend.testando = False
+        backend.proximo_teste = time.monotonic() + self.intervalo_teste
+
+    def _registrar_sucesso(self, backend: Backend):
+        backend.falhas_consecutivas = 0
+        backend.saudavel = True
+
+    def _registrar_falha(self, backend: Backend):
+        backend.falhas += 1
+        backend.falhas_consecutivas += 1
+        if backend.saudavel and backend.falhas_consecutivas >= self.max_falhas:
+            backend.saudavel = False
+            backend.proximo_teste = time.monotonic() + self.intervalo_teste
+            print(f"   ⚠ Servidor {backend.url} marcado como indisponível")
+
+    async def gerar(self, modelo: str, prompt: str, system: str = None,
+                    parar_em_json: bool = False, rotulo: str = None, redacao_id=None, **extras) -> tuple:
+        """Chama /api/generate em modo streaming e retorna (sucesso, resposta_texto)
+
+        Com parar_em_json=True, o stream é fechado logo depois que chega um
+        objeto JSON completo e válido (no máximo PEDACOS_APOS_JSON pedaços
+        depois), e só o texto desse objeto é retornado; fechar a conexão faz o
+        Ollama interromper a geração do restante.
+        Em caso de falha de conexão ou erro 5xx, tenta uma vez em cada um dos
+        outros servidores do pool. `rotulo` agrupa os tempos de prompt em
+        tempos_prompt; `rotulo` e `redacao_id` identificam a chamada nas métricas.
+        """
+        payload = {
+            "model": modelo,
+            "prompt": prompt,
+            "stream": True,
+            **extras,
+        }
+        if system is not None:
+            payload["system"] = system
+        return await self._requisitar("/api/generate", payload, parar_em_json, rotulo, redacao_id=redacao_id)
+
+    async def conversar(self, modelo: str, mensagens: list, parar_em_json: bool = False,
+                        rotulo: str = None, url: str = None, redacao_id=None, **extras) -> tuple:
+        """Chama /api/chat em modo streaming e retorna (sucesso, resposta_texto)
+
+        Com `url`, a requisição vai para esse servidor enquanto ele estiver
+        saudável; turnos seguidos de uma conversa no mesmo servidor reaproveitam
+        o prefixo já processado. Os demais parâmetros funcionam como em gerar.
+        """
+        payload = {
+            "model": modelo,
+            "messages": mensagens,
+            "stream": True,
+            **extras,
+        }
+        return await self._requisitar("/api/chat", payload, parar_em_json, rotulo, url, redacao_id)
+
+    async def _requisitar(self, caminho: str, payload: dict, parar_em_json: bool,
+                          rotulo: str = None, url: str = None, redacao_id=None) -> tuple:
+        """Consulta o cache, roteia a requisição e trata as tentativas em outros servidores"""
+        chave = None
+        if self.cache is not None:
+            chave = self.cache.chave({"endpoint": caminho, **payload})
+            resposta = self.cache.obter(chave)
+            if resposta is not None:
+                if self.metricas is not None:
+                    self.metricas.registrar(rotulo, redacao_id, "cache", True)
+                return True, resposta
+
+        # Depois da chave do cache: o num_ctx não muda a resposta de um prompt que cabe nele
+        num_ctx = self._definir_num_ctx(payload) if self.faixas_num_ctx else None
+        tokens_prompt = estimar_tokens_payload(payload) if self.metricas is not None else None
+
+        def anotar(backend, ok, info, hedge=None):
+            if self.metricas is not None:
+                self.metricas.registrar(
+                    rotulo, redacao_id, backend.url, ok, info.get("espera", 0.0), info.get("duracao", 0.0), info,
+                    limite=info.get("limite"), tokens_prompt_estimados=tokens_prompt, num_ctx=num_ctx, hedge=hedge
+                )
+
+        tentados = []
+        while True:
+            backend = self._escolher_backend(excluir=tentados, preferido=url)
+            tentados.append(backend)
+            ok, resposta, falha_servidor, info = await self._gerar_com_hedge(
+                backend, caminho, payload, parar_em_json, rotulo, tentados, anotar
+            )
+            if ok or not falha_servidor or len(tentados) >= len(self.backends):
+                break
+
+        if ok and rotulo is not None:
+            self._registrar_tempo_prompt(rotulo, info)
+
+        if ok and chave is not None:
+            self.cache.guardar(chave, resposta)
+        return ok, resposta
+
+    def _definir_num_ctx(self, payload: dict) -> int:
+        """Define options.num_ctx da requisição pela menor faixa que comporta prompt + saída
+
+        A faixa de cada modelo só cresce durante a execução: um num_ctx
+        diferente do carregado faz o Ollama recarregar o modelo, então
+        prompts de tamanhos diferentes (redações, agentes ou turnos da
+        sessão) não podem alternar o num_ctx de um mesmo modelo.
+        """
+        opcoes = dict(payload.get("options", {}))
+        if "num_ctx" in opcoes:
+            return opcoes["num_ctx"]
+        necessario = (estimar_tokens_payload(payload) + opcoes.get("num_predict", NUM_PREDICT_PADRAO)) * MARGEM_NUM_CTX
+        faixa = next((f for f in self.faixas_num_ctx if f >= necessario), self.faixas_num_ctx[-1])
+        faixa = max(faixa, self._num_ctx_por_modelo.get(payload["model"], 0))
+        self._num_ctx_por_modelo[payload["model"]] = faixa
+        opcoes["num_ctx"] = faixa
+        payload["options"] = opcoes
+        return faixa
+
+    def _prazo_hedge(self, rotulo: str) -> float:
+        """Prazo (s) para disparar a cópia de uma chamada do rótulo, ou None sem amostras suficientes"""
+        if self.percentil_hedge is None or rotulo is None:
+            return None
+        duracoes = self._duracoes.get(rotulo, ())
+        if len(duracoes) < HEDGE_MIN_AMOSTRAS:
+            return None
+        return percentil(list(duracoes), self.percentil_hedge)
+
+    def _registrar_duracao(self, rotulo: str, duracao: float):
+        if rotulo is not None:
+            self._duracoes.setdefault(rotulo, deque(maxlen=HEDGE_JANELA)).append(duracao)
+
+    async def _gerar_com_hedge(self, backend: Backend, caminho: str, payload: dict, parar_em_json: bool,
+                               rotulo: str, tentados: list, anotar) -> tuple:
+        """Executa a requisição e, se ela passar do prazo do rótulo, dispara uma cópia
+
+        O prazo conta a partir do início da requisição no servidor, sem a
+        espera pela vaga. A cópia vai para o servidor saudável menos ocupado
+        entre os ainda não tentados (sem outro, para outra vaga do mesmo) e
+        não é disparada se não houver vaga livre. A primeira resposta válida vence; fechar o stream da outra faz o Ollama
+        interromper aquela geração. Retorna o mesmo que _gerar_em.
+        """
+        prazo = self._prazo_hedge(rotulo)
+        info_original = {}
+        original = asyncio.create_task(self._gerar_em(backend, caminho, payload, parar_em_json, info_original))
+        pendentes = {original}
+        papeis = {original: ("original", backend, info_original)}
+        try:
+            if prazo is not None:
+                self.hedge["chamadas"] += 1
+                while not original.done():
+                    inicio = info_original.get("inicio")
+                    restante = prazo if inicio is None else inicio + prazo - time.monotonic()
+                    if inicio is not None and restante <= 0:
+                        break
+                    await asyncio.wait(pendentes, timeout=restante)
+
+            dentro_da_taxa = self.hedge["disparados"] < self.taxa_maxima_hedge * self.hedge["chamadas"]
+            reserva = None
+            if prazo is not None and not original.done() and dentro_da_taxa:
+                reserva = self._escolher_reserva(backend, tentados)
+            if reserva is None:
+                ok, resposta, falha_servidor, info = await original
+                pendentes.clear()
+                anotar(backend, ok, info)
+                if ok:
+                    self._registrar_duracao(rotulo, info["duracao"])
+                return ok, resposta, falha_servidor, info
+
+            self.hedge["disparados"] += 1
+            if reserva not in tentados:
+                tentados.append(reserva)
+            info_copia = {}
+            copia = asyncio.create_task(self._gerar_em(reserva, caminho, payload, parar_em_json, info_copia))
+            pendentes.add(copia)
+            papeis[copia] = ("copia", reserva, info_copia)
+
+            resultado = vencedora = None
+            while pendentes and vencedora is None:
+                prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in prontas:
+                    papel, b, info = papeis[tarefa]
+                    ok = tarefa.result()[0]
+                    anotar(b, ok, info, hedge=papel)
+                    if ok and vencedora is None:
+                        vencedora = tarefa
+                    if tarefa is original or resultado is None:
+                        resultado = tarefa.result()
+            if vencedora is None:
+                # As duas falharam: vale o resultado da original, para o retry em outro servidor
+                return resultado
+
+            self._registrar_duracao(rotulo, papeis[vencedora][2]["duracao"])
+            if vencedora is copia:
+                self.hedge["copia_venceu"] += 1
+                if original in pendentes:
+                    economia = self._estimar_restante(info_original, info_copia)
+                    if economia is None:
+                        self.hedge["travadas"] += 1
+                    else:
+                        self.hedge["economia_s"] += economia
+            else:
+                self.hedge["original_venceu"] += 1
+            return vencedora.result()
+        finally:
+            for tarefa in pendentes:
+                tarefa.cancel()
+            if pendentes:
+                await asyncio.gather(*pendentes, return_exceptions=True)
+                for tarefa in pendentes:
+                    papel, b, info = papeis[tarefa]
+                    anotar(b, False, info, hedge=f"{papel}_cancelada")
+                    if tarefa is original and "duracao" in info:
+                        # Limite inferior da duração: sem ela, as chamadas lentas sumiriam das amostras
+                        self._registrar_duracao(rotulo, info["duracao"])
+
+    @staticmethod
+    def _estimar_restante(info_perdedora: dict, info_vencedora: dict) -> float:
+        """Tempo que faltava para a chamada cancelada terminar, pelo ritmo de geração dela
+
+        Supõe que ela geraria tantos tokens quanto a vencedora. Retorna None
+        se a chamada ainda não tinha gerado tokens (travada na fila ou no prompt).
+        """
+        pedacos = info_perdedora.get("pedacos", 0)
+        if pedacos < 2 or "ttft" not in info_perdedora:
+            return None
+        decorrido = time.monotonic() - info_perdedora["inicio"]
+        ritmo = (decorrido - info_perdedora["ttft"]) / (pedacos - 1)
+        return max(0, info_vencedora.get("eval_count", 0) - pedacos) * ritmo
+
+    async def _gerar_em(self, backend: Backend, caminho: str, payload: dict, parar_em_json: bool,
+                        info: dict = None) -> tuple:
+        """Executa a requisição em um servidor; retorna (sucesso, texto, falha_do_servidor, info)
+
+        Além das estatísticas do stream, info traz a espera pela vaga no
+        servidor ("espera") e a duração da requisição HTTP ("duracao").
+        Quem passa `info` acompanha a requisição em andamento: "inicio" é
+        preenchido ao conseguir a vaga e "pedacos" a cada token recebido.
+        """
+        info = {} if info is None else info
+        backend.em_andamento += 1
+        chegada = time.monotonic()
+        try:
+            async with backend.limite:
+                inicio = info["inicio"] = time.monotonic()
+                backend.requisicoes += 1
+                try:
+                    ok, resposta, falha_servidor, info = await self._ler_stream(
+                        backend, caminho, payload, parar_em_json, info
+                    )
+                except httpx.HTTPError as e:
+                    ok, resposta, falha_servidor = False, f"Erro de conexão: {e}", True
+                finally:
+                    # Também na cancelada pelo hedge, para as métricas
+                    info["espera"] = inicio - chegada
+                    info["duracao"] = time.monotonic() - inicio
+                    info["limite"] = backend.limite.atual
+                backend.limite.registrar(falha_servidor, info)
+                backend.tempo_ocupado += info["duracao"]
+                backend.tokens_gerados += info.get("eval_count", 0)
+        finally:
+            backend.em_andamento -= 1
+
+        if falha_servidor:
+            self._registrar_falha(backend)
+        elif ok:
+            self._registrar_sucesso(backend)
+        else:
+            backend.falhas += 1
+        return ok, resposta, falha_servidor, info
+
+    async def _ler_stream(self, backend: Backend, caminho: str, payload: dict, parar_em_json: bool,
+                          info: dict) -> tuple:
+        """Lê o stream NDJSON; info traz as estatísticas do último pedaço e o tempo até o primeiro token"""
+        leitor = LeitorJsonIncremental()
+        pedacos = 0
+        extras_apos_json = 0
+        inicio = time.monotonic()
+
+        async with self._http.stream("POST", f"{backend.url}{caminho}", json=payload) as response:
+            if response.status_code >= 400:
+                corpo = await response.aread()
+                erro = f"HTTP {response.status_code}: {corpo.decode(errors='replace')}"
+                return False, erro, response.status_code >= 500, info
+
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+
+                if line.startswith("data: "):
+                    line = line[6:]
+
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    continue
+
+                if "error" in obj:
+                    return False, f"Erro do Ollama: {obj['error']}", False, info
+
+                # /api/generate envia "response"; /api/chat envia "message.content"
+                token = obj.get("response") or obj.get("message", {}).get("content")
+                if token:
+                    if pedacos == 0:
+                        info["ttft"] = time.monotonic() - inicio
+                    pedacos += 1
+                    info["pedacos"] = pedacos
+                    if parar_em_json:
+                        if leitor.completo:
+                            extras_apos_json -= 1
+                        elif leitor.alimentar(token) is not None:
+                            extras_apos_json = PEDACOS_APOS_JSON
+                        if leitor.completo and extras_apos_json <= 0:
+                            # Cada pedaço do stream corresponde a um token gerado
+                            info["eval_count"] = pedacos
+                            return True, leitor.texto_json, False, info
+                    else:
+                        leitor.alimentar(token)
+
+                if obj.get("done"):
+                    info.update({k: v for k, v in obj.items() if k.endswith(("_count", "_duration"))})
+                    info.setdefault("eval_count", pedacos)
+                    break
+
+        if parar_em_json and leitor.completo:
+            return True, leitor.texto_json, False, info
+        return True, leitor.texto().strip(), False, info
+
+    def _registrar_tempo_prompt(self, rotulo: str, info: dict):
+        t = self.tempos_prompt.setdefault(rotulo, {
+            "chamadas": 0, "com_prompt_eval": 0, "prompt_eval_ns": 0, "prompt_eval_count": 0, "ttft_s": 0.0
+        })
+        t["chamadas"] += 1
+        t["ttft_s"] += info.get("ttft", 0.0)
+        # Respostas interrompidas por parar_em_json não trazem o último pedaço
+        if "prompt_eval_duration" in info:
+            t["com_prompt_eval"] += 1
+            t["prompt_eval_ns"] += info["prompt_eval_duration"]
+            t["prompt_eval_count"] += info.get("prompt_eval_count", 0)
+
+    def descrever_limites(self) -> str:
+        """Limite atual de requisições simultâneas de cada servidor (para o progresso)"""
+        return "limite " + "/".join(str(b.limite.atual) for b in self.backends)
+
+    def resumo(self) -> str:
+        """Resumo de vazão por servidor para o final da execução"""
+        duracao = max(time.monotonic() - self._inicio, 1e-9)
+        linhas = ["Servidores Ollama:"]
+        for b in self.backends:
+            tokens_s = b.tokens_gerados / b.tempo_ocupado if b.tempo_ocupado else 0.0
+            linhas.append(
+                f"  {b.url}: {b.requisicoes} requisições "
+                f"({b.requisicoes / duracao * 60:.1f}/min), {b.falhas} falhas, "
+                f"{b.tokens_gerados} tokens gerados ({tokens_s:.1f} tokens/s), "
+                f"{'saudável' if b.saudavel else 'indisponível'}"
+            )
+            if b.limite.adaptativo:
+                linhas.append(
+                    f"    limite adaptativo: {b.limite.atual} no fim (entre {b.limite.menor} e {b.limite.maior}), "
+                    f"{b.limite.aumentos} aumentos, {b.limite.reducoes} reduções"
+                )
+        h = self.hedge
+        if self.percentil_hedge is not None:
+            taxa = h["disparados"] / h["chamadas"] * 100 if h["chamadas"] else 0.0
+            linhas.append(
+                f"  Hedge (p{self.percentil_hedge:g} por agente): {h['disparados']} cópias em "
+                f"{h['chamadas']} chamadas com prazo ({taxa:.1f}%); a cópia venceu {h['copia_venceu']} "
+                f"({h['travadas']} originais sem nenhum token), a original {h['original_venceu']}; "
+                f"economia estimada {h['economia_s']:.1f} s"
+            )
+        if self.cache is not None:
+            linhas.append(self.cache.resumo())
+        return "\n".join(linhas)
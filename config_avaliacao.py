@@ -0,0 +1,63 @@
+from cliente_ollama import ClienteOllama
+from cache_respostas import CacheRespostas
+
+# Configurações comuns ao uni-agente e ao multi-agente: servidores, cache e
+# limites do cliente do Ollama, e o esquema de uma competência. Ficam em um
+# lugar só para que os dois sejam comparados sempre nas mesmas condições.
+
+# Servidores Ollama; cada requisição vai para o que tiver menos requisições em andamento
+OLLAMA_URLS = [
+    "http://localhost:11434",
+]
+
+# Cache persistente das respostas do modelo. Uma nova execução com os mesmos
+# prompts reaproveita as respostas; IGNORAR_CACHE = True força a regeração.
+USAR_CACHE = True
+ARQUIVO_CACHE = "cache_respostas.sqlite"
+IGNORAR_CACHE = False
+
+# Máximo de requisições simultâneas enviadas a cada servidor Ollama, somando
+# as de todas as redações em andamento. Deve acompanhar o OLLAMA_NUM_PARALLEL
+# configurado nos servidores.
+MAX_REQUISICOES_OLLAMA = 4
+
+# Com CONCORRENCIA_ADAPTATIVA, esse limite é só o ponto de partida: ele sobe
+# enquanto o tempo por token se mantém e cai com fila, timeouts ou erros 5xx
+# (AIMD), até MAX_REQUISICOES_OLLAMA_ADAPTATIVO. NUM_WORKERS precisa gerar
+# demanda para que o limite possa subir.
+CONCORRENCIA_ADAPTATIVA = True
+MAX_REQUISICOES_OLLAMA_ADAPTATIVO = 16
+
+# Envia options.num_ctx em cada requisição: prompt estimado + limite de saída,
+# arredondado para a menor destas faixas. Janelas menores ocupam menos memória
+# de KV cache por slot paralelo. None usa o padrão do servidor.
+FAIXAS_NUM_CTX = [2048, 4096, 8192, 16384]
+
+# Hedge contra gerações travadas ou muito lentas: quando uma chamada passa do
+# percentil PERCENTIL_HEDGE das durações já observadas para o agente, uma cópia
+# vai para outro servidor (ou outra vaga do mesmo) e vale a primeira resposta
+# válida; a outra é cancelada. TAXA_MAXIMA_HEDGE limita a fração de chamadas
+# duplicadas, para a carga extra ficar controlada. None desliga o hedge.
+PERCENTIL_HEDGE = 95
+TAXA_MAXIMA_HEDGE = 0.1
+
+# Nota e justificativa de uma competência, no campo "format" do Ollama
+# (saída estruturada, Ollama >= 0.5)
+ESQUEMA_COMPETENCIA = {
+    "type": "object",
+    "properties": {
+        "nota": {"type": "integer", "minimum": 0, "maximum": 200},
+        "justificativa": {"type": "string"},
+    },
+    "required": ["nota", "justificativa"],
+}
+
+
+def criar_cliente(metricas=None) -> ClienteOllama:
+    """Cliente do Ollama (com o cache, se ativado) montado com as configurações acima"""
+    cache = CacheRespostas(ARQUIVO_CACHE, ignorar=IGNORAR_CACHE) if USAR_CACHE else None
+    return ClienteOllama(
+        OLLAMA_URLS, max_simultaneas=MAX_REQUISICOES_OLLAMA, cache=cache, metricas=metricas,
+        max_simultaneas_adaptativo=MAX_REQUISICOES_OLLAMA_ADAPTATIVO if CONCORRENCIA_ADAPTATIVA else None,
+        faixas_num_ctx=FAIXAS_NUM_CTX, percentil_hedge=PERCENTIL_HEDGE, taxa_maxima_hedge=TAXA_MAXIMA_HEDGE,
+    )
@@ -0,0 +1,154 @@
+import re
+
+from motor_avaliacao import percentil
+
+# Palavras longas viram mais de um token; cada pedaço de até 6 caracteres
+# conta como um, o que fica perto do tokenizador do Gemma em português
+# (cerca de 3,5–4 caracteres por token)
+CARACTERES_POR_PEDACO = 6
+
+# Justificativas nunca são cortadas abaixo disso, mesmo estourando o orçamento
+MIN_TOKENS_JUSTIFICATIVA = 40
+
+_PECAS = re.compile(r"\w+|[^\w\s]")
+_FRASES = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa local do número de tokens, sem carregar o tokenizador do modelo"""
+    if not texto:
+        return 0
+    return sum(1 + (len(p) - 1) // CARACTERES_POR_PEDACO for p in _PECAS.findall(texto))
+
+
+def estimar_tokens_payload(payload: dict) -> int:
+    """Tokens estimados de uma requisição do Ollama (system + prompt, ou todas as mensagens)"""
+    if "messages" in payload:
+        return sum(estimar_tokens(m.get("content", "")) for m in payload["messages"])
+    return estimar_tokens(payload.get("system", "")) + estimar_tokens(payload.get("prompt", ""))
+
+
+def compactar(texto: str) -> str:
+    """Junta espaços e quebras de linha e remove frases repetidas"""
+    vistas = set()
+    frases = []
+    for frase in _FRASES.split(" ".join(texto.split())):
+        chave = frase.lower()
+        if chave not in vistas:
+            vistas.add(chave)
+            frases.append(frase)
+    return " ".join(frases)
+
+
+def _inicio(texto: str, max_tokens: int) -> str:
+    """Começo do texto com até max_tokens, terminando em fim de frase quando possível"""
+    usados = 0
+    fim = 0
+    for m in _PECAS.finditer(texto):
+        usados += 1 + (len(m.group()) - 1) // CARACTERES_POR_PEDACO
+        if usados > max_tokens:
+            break
+        fim = m.end()
+    trecho = texto[:fim]
+    ultimo_ponto = max(trecho.rfind(". "), trecho.rfind("! "), trecho.rfind("? "))
+    if ultimo_ponto > len(trecho) // 2:
+        trecho = trecho[:ultimo_ponto + 1]
+    return trecho
+
+
+def cortar(texto: str, max_tokens: int) -> str:
+    """Mantém o início do texto até max_tokens, marcando o corte com […]"""
+    if estimar_tokens(texto) <= max_tokens:
+        return texto
+    return _inicio(texto, max_tokens) + " […]"
+
+
+def cortar_meio(texto: str, max_tokens: int) -> str:
+    """Mantém o começo e o fim do texto (introdução e conclusão) e remove o meio"""
+    if estimar_tokens(texto) <= max_tokens:
+        return texto
+    metade = max(1, max_tokens // 2)
+    fim = []
+    usados = 0
+    for palavra in reversed(texto.split()):
+        usados += estimar_tokens(palavra)
+        if usados > metade:
+            break
+        fim.append(palavra)
+    return f"{_inicio(texto, metade)}\n[…]\n{' '.join(reversed(fim))}"
+
+
+class ConstrutorPrompt:
+    """Monta prompts dentro de um orçamento de tokens por agente.
+
+    O orçamento de `orcamentos[agente]` vale para system prompt + prompt, com
+    tokens estimados localmente. `montar` recebe uma função
+    formatar(redacao_texto, justificativas) e, enquanto o prompt passar do
+    orçamento, aplica em ordem: compactação das justificativas, corte das
+    justificativas em partes iguais e, por último, corte do meio da redação.
+    Cada prompt montado fica em `registros`, com os tamanhos e os ajustes.
+    """
+
+    def __init__(self, orcamentos: dict, sistemas: dict = None, orcamento_padrao: int = 4096):
+        self.orcamentos = orcamentos
+        self.orcamento_padrao = orcamento_padrao
+        self._tokens_sistema = {agente: estimar_tokens(s) for agente, s in (sistemas or {}).items()}
+        self.registros = []
+
+    def montar(self, agente: str, formatar, redacao_texto: str, justificativas: dict = None,
+               redacao_id=None) -> str:
+        orcamento = self.orcamentos.get(agente, self.orcamento_padrao)
+        tokens_sistema = self._tokens_sistema.get(agente, 0)
+        disponivel = orcamento - tokens_sistema
+        ajustes = []
+
+        prompt = formatar(redacao_texto, justificativas)
+        tokens = estimar_tokens(prompt)
+        tokens_originais = tokens
+
+        if tokens > disponivel and justificativas:
+            justificativas = {k: compactar(str(v)) for k, v in justificativas.items()}
+            prompt = formatar(redacao_texto, justificativas)
+            tokens = estimar_tokens(prompt)
+            ajustes.append("justificativas_compactadas")
+
+        if tokens > disponivel and justificativas:
+            tamanhos = {k: estimar_tokens(v) for k, v in justificativas.items()}
+            cota = max(MIN_TOKENS_JUSTIFICATIVA, (sum(tamanhos.values()) - (tokens - disponivel)) // len(tamanhos))
+            justificativas = {k: cortar(v, cota) for k, v in justificativas.items()}
+            prompt = formatar(redacao_texto, justificativas)
+            tokens = estimar_tokens(prompt)
+            ajustes.append("justificativas_cortadas")
+
+        if tokens > disponivel:
+            tokens_redacao = estimar_tokens(redacao_texto)
+            redacao_texto = cortar_meio(redacao_texto, max(1, tokens_redacao - (tokens - disponivel)))
+            prompt = formatar(redacao_texto, justificativas)
+            tokens = estimar_tokens(prompt)
+            ajustes.append("redacao_cortada")
+
+        self.registros.append({
+            "redacao_id": None if redacao_id is None else str(redacao_id),
+            "agente": agente,
+            "orcamento": orcamento,
+            "tokens_sistema": tokens_sistema,
+            "tokens_prompt_original": tokens_originais,
+            "tokens_prompt": tokens,
+            "ajustes": ajustes,
+        })
+        return prompt
+
+    def resumo(self) -> str:
+        """Tamanho estimado dos prompts por agente e quantos precisaram de ajuste"""
+        linhas = ["Tamanho dos prompts (tokens estimados, system + prompt):"]
+        for agente in sorted({r["agente"] for r in self.registros}):
+            regs = [r for r in self.registros if r["agente"] == agente]
+            totais = [r["tokens_sistema"] + r["tokens_prompt"] for r in regs]
+            ajustados = sum(1 for r in regs if r["ajustes"])
+            economia = sum(r["tokens_prompt_original"] - r["tokens_prompt"] for r in regs)
+            linhas.append(
+                f"  {agente}: p50 {percentil(totais, 50):.0f}, p95 {percentil(totais, 95):.0f}, "
+                f"máx {max(totais)} de {regs[0]['orcamento']}; {ajustados}/{len(regs)} ajustados "
+                f"({economia} tokens a menos)"
+            )
+        return "\n".join(linhas)
@@ -0,0 +1,197 @@
+import os
+import csv
+import json
+import glob
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional
+    pa = pq = None
+
+PARQUET_DISPONIVEL = pa is not None
+
+
+class DestinoBufferizado:
+    """Base dos destinos de resultados.
+
+    `escrever` só acumula o registro em memória; os registros vão para o disco
+    em lote quando o motor chama `checkpoint()`, que termina com fsync. Assim
+    a durabilidade vem dos checkpoints periódicos, e não de uma chamada de
+    sistema por linha. `montar(redacao, resultado, tempo)` permite gravar um
+    registro diferente da linha do CSV.
+    """
+
+    def __init__(self, caminho: str, montar=None):
+        self.caminho = caminho
+        self.montar = montar
+        self._buffer = []
+
+    def escrever(self, linha: dict, redacao: dict, resultado: dict, tempo: float):
+        self._buffer.append(linha if self.montar is None else self.montar(redacao, resultado, tempo))
+
+    def checkpoint(self):
+        """Grava os registros acumulados e garante que estão no disco"""
+        if self._buffer:
+            self._gravar(self._buffer)
+            self._buffer = []
+
+    def fechar(self):
+        self.checkpoint()
+
+    def _gravar(self, registros: list):
+        raise NotImplementedError
+
+
+def _sincronizar(arquivo):
+    arquivo.flush()
+    os.fsync(arquivo.fileno())
+
+
+class DestinoCSV(DestinoBufferizado):
+    """CSV no layout de sempre, acrescentando ao arquivo se ele já existir"""
+
+    def __init__(self, caminho: str, colunas: list, encoding: str = "utf-8", sobrescrever: bool = False):
+        super().__init__(caminho)
+        novo = sobrescrever or not os.path.exists(caminho)
+        self._arquivo = open(caminho, "w" if novo else "a", newline="", encoding=encoding)
+        self._writer = csv.DictWriter(self._arquivo, fieldnames=colunas)
+        if novo:
+            self._writer.writeheader()
+
+    def _gravar(self, registros: list):
+        self._writer.writerows(registros)
+        _sincronizar(self._arquivo)
+
+    def fechar(self):
+        super().fechar()
+        self._arquivo.close()
+
+
+class DestinoJSONL(DestinoBufferizado):
+    """Um registro JSON por linha, só acrescentando (substitui um JSON por redação)"""
+
+    def __init__(self, caminho: str, montar=None, sobrescrever: bool = False):
+        super().__init__(caminho, montar)
+        self._arquivo = open(caminho, "w" if sobrescrever else "a", encoding="utf-8")
+
+    def _gravar(self, registros: list):
+        self._arquivo.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros))
+        _sincronizar(self._arquivo)
+
+    def fechar(self):
+        super().fechar()
+        self._arquivo.close()
+
+
+def _inferir_esquema(registros: list):
+    """bool -> bool, inteiros -> int64, números -> float64, o resto -> string (None não decide o tipo)"""
+    campos = []
+    for coluna in registros[0]:
+        valores = [r.get(coluna) for r in registros if r.get(coluna) is not None]
+        if valores and all(isinstance(v, bool) for v in valores):
+            tipo = pa.bool_()
+        elif valores and all(isinstance(v, int) and not isinstance(v, bool) for v in valores):
+            tipo = pa.int64()
+        elif valores and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores):
+            tipo = pa.float64()
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(coluna, tipo))
+    return pa.schema(campos)
+
+
+def _converter(valor, tipo):
+    """Converte o valor para o tipo da coluna; o que não converter vira nulo"""
+    if valor is None:
+        return None
+    if pa.types.is_boolean(tipo):
+        if isinstance(valor, bool):
+            return valor
+        return {"true": True, "false": False}.get(str(valor).strip().lower())
+    try:
+        if pa.types.is_integer(tipo):
+            return int(valor)
+        if pa.types.is_floating(tipo):
+            return float(valor)
+    except (TypeError, ValueError):
+        return None
+    return valor if isinstance(valor, str) else str(valor)
+
+
+def _faixa_partes(caminho: str) -> tuple:
+    """Números (primeira, última) das partes em um arquivo parte-00003.parquet ou parte-00000-00042.parquet"""
+    numeros = os.path.basename(caminho)[len("parte-"):-len(".parquet")].split("-")
+    return int(numeros[0]), int(numeros[-1])
+
+
+class DestinoParquet(DestinoBufferizado):
+    """Parquet tipado, gravado como uma pasta lida como um único conjunto.
+
+    Durante a execução, cada checkpoint gera uma parte completa, escrita em
+    um temporário com prefixo "_" (ignorado por pandas.read_parquet(caminho))
+    e renomeada, então uma execução interrompida nunca deixa um Parquet sem
+    rodapé. Em `fechar()`, as partes são compactadas em um único arquivo
+    parte-<primeira>-<última>.parquet, com grupos de até `linhas_por_grupo`
+    linhas; se a compactação for interrompida, as partes que ela já cobria
+    são apagadas na próxima abertura. O esquema é inferido do primeiro lote
+    (ou lido das partes já existentes) e mantido.
+    """
+
+    def __init__(self, caminho: str, montar=None, sobrescrever: bool = False, linhas_por_grupo: int = 10000,
+                 compactar: bool = True):
+        if not PARQUET_DISPONIVEL:
+            raise ImportError("pyarrow não está instalado; instale-o para gravar Parquet")
+        super().__init__(caminho, montar)
+        self.linhas_por_grupo = linhas_por_grupo
+        self.compactar = compactar
+        os.makedirs(caminho, exist_ok=True)
+
+        for temporario in glob.glob(os.path.join(caminho, "_*.tmp")):
+            os.remove(temporario)
+        if sobrescrever:
+            for parte in self._partes():
+                os.remove(parte)
+        self._remover_compactadas()
+        partes = self._partes()
+        self._esquema = pq.read_schema(partes[-1]) if partes else None
+        self._proxima_parte = max((_faixa_partes(p)[1] for p in partes), default=-1) + 1
+
+    def _partes(self) -> list:
+        return sorted(glob.glob(os.path.join(self.caminho, "parte-*.parquet")), key=_faixa_partes)
+
+    def _remover_compactadas(self):
+        """Apaga as partes já contidas em um arquivo compactado (compactação interrompida)"""
+        faixas = {parte: _faixa_partes(parte) for parte in self._partes()}
+        for parte, (inicio, fim) in faixas.items():
+            if any(i <= inicio and fim <= f and (i, f) != (inicio, fim) for i, f in faixas.values()):
+                os.remove(parte)
+
+    def _escrever_arquivo(self, tabela, destino: str):
+        """Grava a tabela em um temporário ignorado pelos leitores e o renomeia para `destino`"""
+        temporario = os.path.join(self.caminho, f"_{os.path.basename(destino)}.tmp")
+        with open(temporario, "wb") as f:
+            pq.write_table(tabela, f, row_group_size=self.linhas_por_grupo)
+            _sincronizar(f)
+        os.replace(temporario, destino)
+
+    def _gravar(self, registros: list):
+        if self._esquema is None:
+            self._esquema = _inferir_esquema(registros)
+        colunas = {
+            campo.name: [_converter(r.get(campo.name), campo.type) for r in registros]
+            for campo in self._esquema
+        }
+        tabela = pa.Table.from_pydict(colunas, schema=self._esquema)
+        self._escrever_arquivo(tabela, os.path.join(self.caminho, f"parte-{self._proxima_parte:05d}.parquet"))
+        self._proxima_parte += 1
+
+    def fechar(self):
+        super().fechar()
+        partes = self._partes()
+        if self.compactar and len(partes) > 1:
+            tabela = pa.concat_tables([pq.read_table(parte, schema=self._esquema) for parte in partes])
+            primeira, ultima = _faixa_partes(partes[0])[0], _faixa_partes(partes[-1])[1]
+            self._escrever_arquivo(tabela, os.path.join(self.caminho, f"parte-{primeira:05d}-{ultima:05d}.parquet"))
+            for parte in partes:
+                os.remove(parte)
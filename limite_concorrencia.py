@@ -0,0 +1,104 @@
+import time
+import asyncio
+
+
+class LimiteAdaptativo:
+    """Limite de requisições simultâneas a um servidor, ajustado por AIMD.
+
+    Funciona como um semáforo (`async with limite:`), mas o número de vagas
+    muda conforme o que cada chamada concluída informa em `registrar`:
+
+    - aumento aditivo (+1 a cada `limite` chamadas concluídas) enquanto o
+      limite está todo em uso e o tempo por token gerado continua próximo do
+      melhor já observado;
+    - redução multiplicativa (x `fator_reducao`) quando aparecem falhas do
+      servidor (timeout, erro de conexão, 5xx), fila no servidor (tempo até
+      o primeiro token muito maior que o prompt_eval) ou o tempo por token
+      passa de `tolerancia` vezes o melhor. No máximo uma redução por
+      intervalo de latência, para que uma rajada conte como um evento.
+
+    Assim o limite tende ao ponto em que o servidor para de ganhar vazão.
+    Com `adaptativo=False` o limite fica fixo em `inicial`.
+    """
+
+    def __init__(self, inicial: int, minimo: int = 1, maximo: int = 32, adaptativo: bool = True,
+                 tolerancia: float = 1.5, fator_reducao: float = 0.7, limiar_fila: float = 1.0):
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.limite = float(min(max(inicial, self.minimo), self.maximo))
+        self.adaptativo = adaptativo
+        self.tolerancia = tolerancia
+        self.fator_reducao = fator_reducao
+        self.limiar_fila = limiar_fila
+
+        self.em_uso = 0
+        self.aumentos = 0
+        self.reducoes = 0
+        self.menor = self.maior = int(self.limite)
+        self._tempo_token = None  # Média móvel do tempo por token gerado
+        self._melhor_tempo_token = None
+        self._duracao = 0.0
+        self._ultima_reducao = 0.0
+        self._condicao = asyncio.Condition()
+
+    @property
+    def atual(self) -> int:
+        return int(self.limite)
+
+    async def __aenter__(self):
+        async with self._condicao:
+            await self._condicao.wait_for(lambda: self.em_uso < self.atual)
+            self.em_uso += 1
+
+    async def __aexit__(self, *exc):
+        async with self._condicao:
+            self.em_uso -= 1
+            self._condicao.notify_all()
+
+    def registrar(self, falha_servidor: bool, info: dict):
+        """Ajusta o limite com o resultado de uma chamada (chamar antes de liberar a vaga)"""
+        if not self.adaptativo:
+            return
+        duracao = info.get("duracao", 0.0)
+        self._duracao = duracao if not self._duracao else 0.8 * self._duracao + 0.2 * duracao
+
+        if falha_servidor:
+            self._reduzir()
+            return
+
+        ttft = info.get("ttft")
+        tokens = info.get("eval_count", 0)
+        if ttft is None or tokens < 2:
+            return
+
+        # Fila no servidor: o primeiro token demorou bem mais que carregar e ler o prompt
+        preparo = (info.get("prompt_eval_duration", 0) + info.get("load_duration", 0)) / 1e9
+        if "prompt_eval_duration" in info and ttft - preparo > self.limiar_fila:
+            self._reduzir()
+            return
+
+        tempo_token = (duracao - ttft) / (tokens - 1)
+        if self._tempo_token is None:
+            self._tempo_token = self._melhor_tempo_token = tempo_token
+        else:
+            self._tempo_token = 0.8 * self._tempo_token + 0.2 * tempo_token
+            # O melhor tempo sobe devagar, acompanhando mudanças no tamanho das redações
+            self._melhor_tempo_token = min(self._tempo_token, self._melhor_tempo_token * 1.002)
+
+        if self._tempo_token > self._melhor_tempo_token * self.tolerancia:
+            self._reduzir()
+        elif self.em_uso >= self.atual and self.limite < self.maximo:
+            antes = self.atual
+            self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            if self.atual > antes:
+                self.aumentos += 1
+                self.maior = max(self.maior, self.atual)
+
+    def _reduzir(self):
+        agora = time.monotonic()
+        if agora - self._ultima_reducao < self._duracao:
+            return
+        self._ultima_reducao = agora
+        self.limite = max(self.minimo, self.limite * self.fator_reducao)
+        self.menor = min(self.menor, self.atual)
+        self.reducoes += 1
@@ -0,0 +1,88 @@
+import json
+import time
+
+from motor_avaliacao import percentil
+
+# Campos de tempo e tokens do último pedaço do stream do Ollama (durações em ns)
+CAMPOS_OLLAMA = (
+    "eval_count", "eval_duration", "prompt_eval_count", "prompt_eval_duration",
+    "load_duration", "total_duration",
+)
+
+
+class MetricasChamadas:
+    """Métricas de cada chamada ao modelo, gravadas em JSONL.
+
+    Cada registro traz a redação, o agente (C1–C5, AGREGADOR ou uni), o
+    servidor, o tempo de espera pela vaga no servidor, o tempo total no
+    cliente, o tempo até o primeiro token e os campos de CAMPOS_OLLAMA.
+    Respostas vindas do cache entram com servidor "cache" e sem campos do
+    Ollama. Com hedge, o campo "hedge" diz se o registro é da requisição
+    original ou da cópia e se ela foi cancelada. Os registros são gravados
+    em lote pelo buffer do arquivo.
+    """
+
+    def __init__(self, caminho: str = None):
+        self.caminho = caminho
+        self.registros = []
+        self._arquivo = open(caminho, "a", encoding="utf-8") if caminho else None
+
+    def registrar(self, agente: str, redacao_id, servidor: str, ok: bool,
+                  espera_s: float = 0.0, duracao_s: float = 0.0, info: dict = None, **extras):
+        info = info or {}
+        registro = {
+            "instante": round(time.time(), 3),
+            "redacao_id": None if redacao_id is None else str(redacao_id),
+            "agente": agente,
+            "servidor": servidor,
+            "ok": ok,
+            "espera_s": round(espera_s, 4),
+            "duracao_s": round(duracao_s, 4),
+            "ttft_s": round(info["ttft"], 4) if "ttft" in info else None,
+            **{campo: info.get(campo) for campo in CAMPOS_OLLAMA},
+            **extras,
+        }
+        self.registros.append(registro)
+        if self._arquivo is not None:
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def resumo(self) -> str:
+        """Percentis de tempo e tokens/s por agente, separando prompt, geração e carga do modelo"""
+        chamadas = [r for r in self.registros if r["ok"] and r["servidor"] != "cache"]
+        linhas = [f"Métricas por chamada ({len(chamadas)} chamadas ao modelo"
+                  + (f", gravadas em {self.caminho})" if self.caminho else ")")]
+
+        agentes = sorted({r["agente"] or "-" for r in chamadas})
+        for agente in agentes:
+            regs = [r for r in chamadas if (r["agente"] or "-") == agente]
+            duracoes = [r["duracao_s"] for r in regs]
+            ttfts = [r["ttft_s"] for r in regs if r["ttft_s"] is not None]
+            prompt_ms = [r["prompt_eval_duration"] / 1e6 for r in regs if r["prompt_eval_duration"]]
+            carga_ms = [r["load_duration"] / 1e6 for r in regs if r["load_duration"]]
+            geracao = [r["eval_count"] / (r["eval_duration"] / 1e9) for r in regs if r["eval_duration"]]
+            leitura = [r["prompt_eval_count"] / (r["prompt_eval_duration"] / 1e9)
+                       for r in regs if r["prompt_eval_duration"] and r["prompt_eval_count"]]
+            linhas.append(
+                f"  {agente}: {len(regs)} chamadas; tempo p50 {percentil(duracoes, 50):.2f} s, "
+                f"p95 {percentil(duracoes, 95):.2f} s; 1º token p50 {percentil(ttfts, 50):.2f} s, "
+                f"p95 {percentil(ttfts, 95):.2f} s"
+            )
+            faixas = sorted({r["num_ctx"] for r in regs if r.get("num_ctx")})
+            linhas.append(
+                f"      prompt_eval p50 {percentil(prompt_ms, 50):.0f} ms ({percentil(leitura, 50):.0f} tokens/s), "
+                f"geração p50 {percentil(geracao, 50):.1f} tokens/s, "
+                f"carga do modelo p95 {percentil(carga_ms, 95):.0f} ms"
+                + (f", num_ctx {'/'.join(map(str, faixas))}" if faixas else "")
+            )
+
+        # Chamadas canceladas pelo hedge (a outra cópia respondeu antes) não são falhas
+        canceladas = sum(1 for r in self.registros if (r.get("hedge") or "").endswith("_cancelada"))
+        falhas = sum(1 for r in self.registros if not r["ok"]) - canceladas
+        do_cache = sum(1 for r in self.registros if r["servidor"] == "cache")
+        linhas.append(f"  {falhas} chamadas com falha, {canceladas} canceladas pelo hedge, {do_cache} respostas do cache")
+        return "\n".join(linhas)
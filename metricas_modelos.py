@@ -0,0 +1,307 @@
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Métricas de concordância com as notas humanas para qualquer número de
+# avaliadores (uni-agente, multi-agente e os que vierem), lidas uma vez de cada
+# arquivo e calculadas em uma passada vetorizada: RMSE, acurácia exata, MAE,
+# correlação de Pearson e kappa ponderado quadrático (QWK), para a nota total
+# e para cada competência. Substitui metricasAcuraciaRSME.py e metricaKappa.py.
+# QWK, RMSE e MAE vêm com intervalos de confiança por bootstrap e, para cada
+# par de modelos, com o bootstrap pareado da diferença nas mesmas redações.
+
+# --- CONFIGURAÇÕES ---
+COMPETENCIAS = ["C1", "C2", "C3", "C4", "C5"]
+
+# Um conjunto por avaliador: arquivo (xlsx, csv ou parquet), coluna com o id
+# da redação (para parear os modelos), colunas (nota humana, nota do modelo)
+# da nota total e de cada competência e, opcional,
+# uma coluna que, preenchida, exclui a linha (ex.: falhas_agente, competências
+# cuja nota não veio do modelo). Para comparar um novo avaliador, basta
+# acrescentar um conjunto aqui.
+CONJUNTOS = [
+    {
+        "modelo": "Uni-Agente",
+        "arquivo": "Resultados/Redações Uni-agente.xlsx",
+        "id": "id",
+        "total": ("nota_antiga", "nota_nova"),
+        "competencias": {f"C{i}": (f"c{i}_antiga", f"c{i}") for i in range(1, 6)},
+    },
+    {
+        "modelo": "Multi-Agente",
+        "arquivo": "Resultados/Redações Multi-Agente.xlsx",
+        "id": "redacao_id",
+        "total": ("nota_original_total", "nota_agregador_validada_total"),
+        "competencias": {f"C{i}": (f"nota_original_C{i}", f"nota_agregador_validada_C{i}") for i in range(1, 6)},
+        "excluir_se": "falhas_agente",
+    },
+]
+
+# Bootstrap: reamostragens das redações (com reposição), nível dos intervalos
+# percentis e semente. As reamostragens são processadas em blocos para limitar
+# a memória da matriz de contagens (bloco x redações).
+REAMOSTRAGENS_BOOTSTRAP = 10000
+NIVEL_CONFIANCA = 0.95
+SEMENTE_BOOTSTRAP = 42
+BLOCO_BOOTSTRAP = 2000
+METRICAS_BOOTSTRAP = ["QWK (Kappa)", "RMSE", "MAE"]
+
+ARQUIVO_RELATORIO = "avaliacao_final_modelos.xlsx"
+# Notas humanas x notas do modelo de cada conjunto; None desativa (requer matplotlib)
+GRAFICO_DISPERSAO = "comparacao_modelos.png"
+
+# Casas decimais no relatório (os intervalos seguem a métrica)
+CASAS = {"RMSE": 2, "MAE": 2, "Acurácia": 4, "Correlação (Pearson)": 4, "QWK (Kappa)": 4}
+CASAS.update({f"{m} IC {lado}": CASAS[m] for m in METRICAS_BOOTSTRAP for lado in ("inf", "sup")})
+
+
+def ler_tabela(caminho: str, colunas: list) -> pd.DataFrame:
+    """Lê só as colunas usadas de um resultado em xlsx, csv ou parquet"""
+    sufixo = Path(caminho).suffix.lower()
+    if sufixo == ".csv":
+        return pd.read_csv(caminho, usecols=lambda c: c in colunas)
+    if sufixo == ".parquet":
+        return pd.read_parquet(caminho, columns=colunas)
+    return pd.read_excel(caminho, usecols=lambda c: c in colunas)
+
+
+def carregar_conjunto(conjunto: dict) -> tuple:
+    """Ids das redações (sem repetição), matrizes (n, 6) de notas humanas e do modelo (total + C1–C5)
+    e as linhas excluídas"""
+    pares = [conjunto["total"]] + [conjunto["competencias"][c] for c in COMPETENCIAS]
+    colunas = [c for par in pares for c in par]
+    filtro = conjunto.get("excluir_se")
+    df = ler_tabela(conjunto["arquivo"], [conjunto["id"]] + colunas + ([filtro] if filtro else []))
+
+    # Uma redação repetida (ex.: refeita ao retomar a execução) vale pela última linha
+    repetidas = df.duplicated(conjunto["id"], keep="last")
+    if repetidas.any():
+        print(f"{conjunto['modelo']}: {int(repetidas.sum())} linhas repetidas de redações ignoradas (vale a última)")
+        df = df[~repetidas]
+
+    excluidas = 0
+    if filtro and filtro in df.columns:
+        manter = df[filtro].isna() | (df[filtro].astype(str).str.strip() == "")
+        excluidas = int((~manter).sum())
+        df = df[manter]
+
+    ids = df[conjunto["id"]].astype(str).to_numpy()
+    numeros = df.reindex(columns=colunas).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    return ids, numeros[:, 0::2], numeros[:, 1::2], excluidas
+
+
+def indices_categorias(real: np.ndarray, previsto: np.ndarray) -> tuple:
+    """Troca as notas pelo índice delas entre os valores observados de cada coluna (NaN fica NaN)
+
+    Os pesos do QWK usam a distância entre índices de categoria, como o
+    cohen_kappa_score(weights="quadratic") usado antes.
+    """
+    ia = np.full(real.shape, np.nan)
+    ib = np.full(previsto.shape, np.nan)
+    for j in range(real.shape[1]):
+        validas = ~(np.isnan(real[:, j]) | np.isnan(previsto[:, j]))
+        categorias = np.unique(np.concatenate([real[validas, j], previsto[validas, j]]))
+        ia[validas, j] = np.searchsorted(categorias, real[validas, j])
+        ib[validas, j] = np.searchsorted(categorias, previsto[validas, j])
+    return ia, ib
+
+
+def calcular_metricas(real: np.ndarray, previsto: np.ndarray) -> dict:
+    """RMSE, acurácia, MAE, Pearson e QWK de cada coluna, em uma passada sobre as matrizes (n, k)
+
+    Linhas com NaN em uma coluna ficam fora só daquela coluna. O QWK sai da
+    forma fechada da matriz de confusão com pesos quadráticos:
+    1 - Σ(a-b)² / (Σa² + Σb² - 2·Σa·Σb/n), com a e b os índices de categoria.
+    """
+    ia, ib = indices_categorias(real, previsto)
+    validas = ~(np.isnan(real) | np.isnan(previsto))
+    n = validas.sum(axis=0)
+    r = np.where(validas, real, 0.0)
+    p = np.where(validas, previsto, 0.0)
+    a = np.where(validas, ia, 0.0)
+    b = np.where(validas, ib, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        erro = p - r
+        media_r = r.sum(axis=0) / n
+        media_p = p.sum(axis=0) / n
+        dr = np.where(validas, r - media_r, 0.0)
+        dp = np.where(validas, p - media_p, 0.0)
+        esperado = (a ** 2).sum(axis=0) + (b ** 2).sum(axis=0) - 2 * a.sum(axis=0) * b.sum(axis=0) / n
+        return {
+            "N": n,
+            "RMSE": np.sqrt((erro ** 2).sum(axis=0) / n),
+            "Acurácia": ((erro == 0) & validas).sum(axis=0) / n,
+            "MAE": np.abs(erro).sum(axis=0) / n,
+            "Correlação (Pearson)": (dr * dp).sum(axis=0) / np.sqrt((dr ** 2).sum(axis=0) * (dp ** 2).sum(axis=0)),
+            "QWK (Kappa)": 1 - ((a - b) ** 2).sum(axis=0) / esperado,
+        }
+
+
+def metricas_ponderadas(pesos: np.ndarray, real: np.ndarray, previsto: np.ndarray,
+                        ia: np.ndarray, ib: np.ndarray) -> dict:
+    """QWK, RMSE e MAE de cada reamostragem, com `pesos` (B, n) as vezes que cada redação foi sorteada
+
+    Cada soma da forma fechada vira um produto de matrizes pesos @ (n, k), para
+    todas as reamostragens e colunas de uma vez. As categorias do QWK são as
+    da amostra completa (como passar labels= ao cohen_kappa_score), para que
+    uma categoria ausente na reamostragem não mude as distâncias entre as outras.
+    """
+    validas = ~(np.isnan(real) | np.isnan(previsto))
+    erro = np.where(validas, previsto - real, 0.0)
+    a = np.where(validas, ia, 0.0)
+    b = np.where(validas, ib, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = pesos @ validas.astype(float)
+        esperado = pesos @ (a ** 2) + pesos @ (b ** 2) - 2 * (pesos @ a) * (pesos @ b) / n
+        return {
+            "QWK (Kappa)": 1 - pesos @ ((a - b) ** 2) / esperado,
+            "RMSE": np.sqrt(pesos @ (erro ** 2) / n),
+            "MAE": pesos @ np.abs(erro) / n,
+        }
+
+
+def contagens_reamostragem(n: int, reamostragens: int, rng: np.random.Generator) -> np.ndarray:
+    """Matriz (reamostragens, n) com quantas vezes cada redação saiu em cada reamostragem"""
+    sorteio = rng.integers(0, n, size=(reamostragens, n)) + n * np.arange(reamostragens)[:, None]
+    return np.bincount(sorteio.ravel(), minlength=reamostragens * n).reshape(reamostragens, n).astype(float)
+
+
+def reamostrar(modelos: list, rng: np.random.Generator) -> list:
+    """Métricas de bootstrap (B, k) de cada modelo, com as mesmas reamostragens para todos
+
+    `modelos` é uma lista de (real, previsto) com as linhas alinhadas; com mais
+    de um modelo, as reamostragens são pareadas (as mesmas redações em cada uma).
+    """
+    n = len(modelos[0][0])
+    preparados = [(real, previsto, *indices_categorias(real, previsto)) for real, previsto in modelos]
+    blocos = [{m: [] for m in METRICAS_BOOTSTRAP} for _ in modelos]
+    for inicio in range(0, REAMOSTRAGENS_BOOTSTRAP, BLOCO_BOOTSTRAP):
+        pesos = contagens_reamostragem(n, min(BLOCO_BOOTSTRAP, REAMOSTRAGENS_BOOTSTRAP - inicio), rng)
+        for acumulado, arrays in zip(blocos, preparados):
+            for nome, valores in metricas_ponderadas(pesos, *arrays).items():
+                acumulado[nome].append(valores)
+    return [{nome: np.vstack(partes) for nome, partes in acumulado.items()} for acumulado in blocos]
+
+
+def intervalo(amostras: np.ndarray) -> tuple:
+    """Limites (inferior, superior) do intervalo percentil de cada coluna das amostras (B, k)"""
+    alfa = (1 - NIVEL_CONFIANCA) / 2 * 100
+    with np.errstate(invalid="ignore"):
+        return tuple(np.nanpercentile(amostras, [alfa, 100 - alfa], axis=0))
+
+
+def comparar_pareado(dados: dict, rng: np.random.Generator) -> list:
+    """Bootstrap pareado da diferença de QWK, RMSE e MAE (B − A) para cada par de modelos
+
+    Os modelos são alinhados pelo id da redação e só entram as redações
+    presentes nos dois. O p é bicaudal: o dobro da fração de reamostragens em
+    que a diferença fica do lado oposto ao zero.
+    """
+    linhas = []
+    for (modelo_a, (ids_a, real_a, prev_a)), (modelo_b, (ids_b, real_b, prev_b)) in combinations(dados.items(), 2):
+        _, ia, ib = np.intersect1d(ids_a, ids_b, return_indices=True)
+        if len(ia) < 2:
+            print(f"Sem redações em comum entre {modelo_a} e {modelo_b}; comparação pareada ignorada")
+            continue
+        pontual_a = metricas_ponderadas(np.ones((1, len(ia))), real_a[ia], prev_a[ia], *indices_categorias(real_a[ia], prev_a[ia]))
+        pontual_b = metricas_ponderadas(np.ones((1, len(ib))), real_b[ib], prev_b[ib], *indices_categorias(real_b[ib], prev_b[ib]))
+        boot_a, boot_b = reamostrar([(real_a[ia], prev_a[ia]), (real_b[ib], prev_b[ib])], rng)
+        for nome in METRICAS_BOOTSTRAP:
+            diferencas = boot_b[nome] - boot_a[nome]
+            inferior, superior = intervalo(diferencas)
+            validas = ~np.isnan(diferencas)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                p = np.minimum(1.0, 2 * np.minimum((diferencas <= 0).sum(axis=0), (diferencas >= 0).sum(axis=0))
+                               / validas.sum(axis=0))
+            diferenca = pontual_b[nome][0] - pontual_a[nome][0]
+            for j, alvo in enumerate(["Total"] + COMPETENCIAS):
+                linhas.append({
+                    "Alvo": alvo, "Métrica": nome, "Modelo A": modelo_a, "Modelo B": modelo_b,
+                    "N pareado": len(ia), "Diferença (B − A)": diferenca[j],
+                    "IC inf": inferior[j], "IC sup": superior[j], "p (bootstrap)": p[j],
+                })
+    return linhas
+
+
+def montar_tabelas(resultados: dict) -> tuple:
+    """Planilhas "Resumo Geral" (nota total) e "Por Competência" com as métricas e os intervalos de cada modelo"""
+    resumo = []
+    por_competencia = []
+    for modelo, (metricas, intervalos, excluidas) in resultados.items():
+        for j, alvo in enumerate(["Total"] + COMPETENCIAS):
+            linha = {nome: valores[j] for nome, valores in metricas.items()}
+            for nome, (inferior, superior) in intervalos.items():
+                linha[f"{nome} IC inf"] = inferior[j]
+                linha[f"{nome} IC sup"] = superior[j]
+            if alvo == "Total":
+                resumo.append({"Modelo": modelo, **linha, "Excluídas": excluidas})
+            else:
+                por_competencia.append({"Competência": alvo, "Modelo": modelo, **linha})
+    return pd.DataFrame(resumo).round(CASAS), pd.DataFrame(por_competencia).round(CASAS)
+
+
+def gerar_grafico(dados: dict, resumo: pd.DataFrame, arquivo: str):
+    """Dispersão nota humana x nota do modelo (total), um painel por conjunto"""
+    import matplotlib.pyplot as plt
+
+    fig, eixos = plt.subplots(1, len(dados), figsize=(6 * len(dados), 5), squeeze=False)
+    for eixo, (modelo, (real, previsto)) in zip(eixos[0], dados.items()):
+        qwk = resumo.loc[resumo["Modelo"] == modelo, "QWK (Kappa)"].iloc[0]
+        eixo.scatter(real[:, 0], previsto[:, 0], alpha=0.6)
+        eixo.plot([0, 1000], [0, 1000], "r--")
+        eixo.set_title(f"{modelo} (QWK={qwk})")
+        eixo.set_xlabel("Nota Humana")
+        eixo.set_ylabel("Nota IA")
+        eixo.grid(alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(arquivo, dpi=300)
+    plt.close(fig)
+
+
+def main():
+    rng = np.random.default_rng(SEMENTE_BOOTSTRAP)
+    inicio = time.perf_counter()
+    dados = {}
+    resultados = {}
+    for conjunto in CONJUNTOS:
+        ids, real, previsto, excluidas = carregar_conjunto(conjunto)
+        boot = reamostrar([(real, previsto)], rng)[0]
+        dados[conjunto["modelo"]] = (ids, real, previsto)
+        resultados[conjunto["modelo"]] = (
+            calcular_metricas(real, previsto),
+            {nome: intervalo(amostras) for nome, amostras in boot.items()},
+            excluidas,
+        )
+    pareado = pd.DataFrame(comparar_pareado(dados, rng))
+    if not pareado.empty:
+        pareado = pareado.round({"Diferença (B − A)": 4, "IC inf": 4, "IC sup": 4, "p (bootstrap)": 4})
+    print(f"Métricas e bootstrap ({REAMOSTRAGENS_BOOTSTRAP} reamostragens, IC {NIVEL_CONFIANCA:.0%}) "
+          f"em {time.perf_counter() - inicio:.2f}s\n")
+
+    resumo, por_competencia = montar_tabelas(resultados)
+    print(resumo.to_string(index=False))
+    print()
+    print(por_competencia.to_string(index=False))
+    if not pareado.empty:
+        print()
+        print(pareado.to_string(index=False))
+
+    with pd.ExcelWriter(ARQUIVO_RELATORIO) as writer:
+        resumo.to_excel(writer, sheet_name="Resumo Geral", index=False)
+        por_competencia.to_excel(writer, sheet_name="Por Competência", index=False)
+        if not pareado.empty:
+            pareado.to_excel(writer, sheet_name="Diferenças Pareadas", index=False)
+    print(f"\nRelatório salvo em: {ARQUIVO_RELATORIO}")
+
+    if GRAFICO_DISPERSAO:
+        gerar_grafico({m: (r, p) for m, (_, r, p) in dados.items()}, resumo, GRAFICO_DISPERSAO)
+        print(f"Gráfico salvo em: {GRAFICO_DISPERSAO}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import time
+import random
+import asyncio
+
+
+class FalhaAvaliacao(Exception):
+    """Falha recuperável de uma avaliação (ex.: JSON inválido); o motor tenta de novo"""
+
+
+class Estrategia:
+    """Interface das estratégias de avaliação plugadas no MotorAvaliacao.
+
+    Uma estratégia sabe avaliar uma redação com o cliente do LLM (incluindo a
+    análise da resposta) e transformar o resultado em uma linha de saída.
+    """
+
+    nome = ""
+
+    def id_redacao(self, redacao: dict) -> str:
+        return str(redacao.get("id", "N/A"))
+
+    async def avaliar(self, cliente, redacao: dict) -> dict:
+        """Avalia a redação; levanta FalhaAvaliacao para pedir uma nova tentativa"""
+        raise NotImplementedError
+
+    def montar_linha(self, redacao: dict, resultado: dict) -> dict:
+        raise NotImplementedError
+
+
+class AgendadorPorRedacao:
+    """Pool de workers: cada redação é avaliada do início ao fim por um worker"""
+
+    def __init__(self, num_workers: int = 4):
+        self.num_workers = max(1, num_workers)
+
+    async def executar(self, motor, redacoes):
+        # As redações são puxadas sob demanda, então `redacoes` pode ser um gerador
+        itens = enumerate(redacoes)
+
+        async def worker():
+            while True:
+                try:
+                    idx, redacao = next(itens)
+                except StopIteration:
+                    return
+                await motor.processar(idx, redacao)
+
+        await asyncio.gather(*(worker() for _ in range(self.num_workers)))
+
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil p (0–100) pelo método do vizinho mais próximo"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class MotorAvaliacao:
+    """Motor comum às estratégias uni-agente e multi-agente.
+
+    Encadeia os estágios: redações carregadas -> agendador -> estratégia
+    (cliente do LLM + análise da resposta) -> destinos. Cuida também do que é
+    igual para qualquer estratégia: pular redações já concluídas no diário,
+    repetir avaliações que levantam FalhaAvaliacao com espera exponencial e
+    jitter, medir o tempo de cada redação e entregar as linhas aos destinos
+    na ordem das redações, mesmo que terminem fora de ordem.
+
+    Os destinos acumulam as linhas e só gravam em checkpoints, feitos a cada
+    `linhas_por_checkpoint` linhas ou `intervalo_checkpoint` segundos; os IDs
+    entram no diário depois do checkpoint, então uma execução interrompida
+    refaz no máximo as redações desde o último.
+    """
+
+    def __init__(self, estrategia: Estrategia, cliente, destinos: list, agendador=None, diario=None,
+                 max_tentativas: int = 1, espera_base: float = 1.0, espera_maxima: float = 30.0,
+                 linhas_por_checkpoint: int = 50, intervalo_checkpoint: float = 30.0):
+        self.estrategia = estrategia
+        self.cliente = cliente
+        self.destinos = destinos
+        self.agendador = agendador or AgendadorPorRedacao()
+        self.diario = diario
+        self.max_tentativas = max(1, max_tentativas)
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.linhas_por_checkpoint = max(1, linhas_por_checkpoint)
+        self.intervalo_checkpoint = intervalo_checkpoint
+
+        self.tempos = []
+        self.concluidas = 0
+        self.falhas = 0
+        self.total = 0
+        self._pendentes = {}
+        self._proxima = 0
+        self._duracao = 0.0
+        self._sem_checkpoint = []
+        self._ultimo_checkpoint = time.monotonic()
+
+    def faltantes(self, redacoes):
+        """Redações que ainda não constam no diário
+
+        Listas são filtradas de uma vez; outros iteráveis (ex.: o carregador
+        em streaming) são filtrados sob demanda, sem ficarem em memória.
+        """
+        if self.diario is None:
+            return redacoes
+        filtradas = (r for r in redacoes if self.estrategia.id_redacao(r) not in self.diario)
+        return list(filtradas) if isinstance(redacoes, list) else filtradas
+
+    async def executar(self, redacoes):
+        """Avalia as redações ainda não concluídas e grava os resultados nos destinos"""
+        em_lista = isinstance(redacoes, list)
+        redacoes = self.faltantes(redacoes)
+        self.total = len(redacoes) if em_lista else None
+        self._pendentes = {}
+        self._proxima = 0
+
+        inicio = time.perf_counter()
+        await self.agendador.executar(self, redacoes)
+        self._duracao = time.perf_counter() - inicio
+
+    async def processar(self, idx: int, redacao: dict, avaliar=None):
+        """Avalia uma redação (com tentativas) e entrega o resultado na posição idx
+
+        `avaliar` é uma função sem argumentos que devolve a corrotina de
+        avaliação; por padrão, a avaliação completa da estratégia.
+        """
+        if avaliar is None:
+            avaliar = lambda: self.estrategia.avaliar(self.cliente, redacao)
+        redacao_id = self.estrategia.id_redacao(redacao)
+        posicao = f"{idx + 1}/{self.total}" if self.total is not None else f"{idx + 1}"
+        print(f"\n[{posicao}] Processando redação {redacao_id}...")
+
+        inicio = time.perf_counter()
+        resultado = None
+        for tentativa in range(self.max_tentativas):
+            try:
+                resultado = await avaliar()
+                break
+            except FalhaAvaliacao as e:
+                print(f"   [{redacao_id}] Tentativa {tentativa + 1}/{self.max_tentativas} falhou: {e}")
+                if tentativa + 1 < self.max_tentativas:
+                    # Jitter evita que vários workers repitam juntos sobre um servidor sobrecarregado
+                    espera = min(self.espera_maxima, self.espera_base * 2 ** tentativa)
+                    await asyncio.sleep(random.uniform(0, espera))
+            except Exception as e:
+                print(f"   Erro ao avaliar redação {redacao_id}: {e}")
+                break
+        tempo = time.perf_counter() - inicio
+
+        if resultado is None:
+            print(f"   ✖ [{posicao}] Falha ao avaliar redação {redacao_id}")
+            self.falhas += 1
+            self._entregar(idx, None)
+        else:
+            print(f"   ✔ [{posicao}] Redação {redacao_id} avaliada em {tempo:.1f} s ({self.cliente.descrever_limites()})")
+            self.tempos.append(tempo)
+            self._entregar(idx, (redacao, resultado, tempo))
+
+    def _entregar(self, idx: int, concluida):
+        """Guarda o resultado e escreve, em ordem, tudo o que já pode ser escrito"""
+        self._pendentes[idx] = concluida
+        while self._proxima in self._pendentes:
+            concluida = self._pendentes.pop(self._proxima)
+            self._proxima += 1
+            if concluida is None:
+                continue
+
+            redacao, resultado, tempo = concluida
+            try:
+                linha = self.estrategia.montar_linha(redacao, resultado)
+            except Exception as e:
+                print(f"   Erro ao montar a linha da redação {self.estrategia.id_redacao(redacao)}: {e}")
+                self.falhas += 1
+                continue
+
+            for destino in self.destinos:
+                destino.escrever(linha, redacao, resultado, tempo)
+            self._sem_checkpoint.append(self.estrategia.id_redacao(redacao))
+            self.concluidas += 1
+
+        if (len(self._sem_checkpoint) >= self.linhas_por_checkpoint
+                or time.monotonic() - self._ultimo_checkpoint >= self.intervalo_checkpoint):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Grava o que os destinos acumularam e só então registra os IDs no diário"""
+        for destino in self.destinos:
+            destino.checkpoint()
+        if self.diario is not None and self._sem_checkpoint:
+            self.diario.registrar_lote(self._sem_checkpoint)
+        self._sem_checkpoint = []
+        self._ultimo_checkpoint = time.monotonic()
+
+    def fechar(self):
+        try:
+            self.checkpoint()
+        finally:
+            for destino in self.destinos:
+                destino.fechar()
+            if self.diario is not None:
+                self.diario.fechar()
+
+    def resumo(self) -> str:
+        """Resumo de tempos e vazão da execução"""
+        linhas = [f"Estratégia {self.estrategia.nome}: {self.concluidas} redações concluídas, {self.falhas} falhas"]
+        if self.tempos:
+            linhas.append(
+                f"Tempo por redação: média {sum(self.tempos) / len(self.tempos):.1f} s, "
+                f"p50 {percentil(self.tempos, 50):.1f} s, p95 {percentil(self.tempos, 95):.1f} s; "
+                f"{self.concluidas / max(self._duracao, 1e-9) * 60:.1f} redações/min"
+            )
+        return "\n".join(linhas)
@@ -1,14 +1,107 @@
 import json
 import asyncio
-import httpx
 import csv
 from pathlib import Path
 from datetime import datetime
-import random
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
+import os
+
+from cliente_ollama import ClienteOllama
+from config_avaliacao import ESQUEMA_COMPETENCIA, criar_cliente
+from metricas_chamadas import MetricasChamadas
+from construtor_prompt import ConstrutorPrompt
+from analise_json import extrair_campos
+from reparo_respostas import ReparadorRespostas, validar_campos, esquema_parcial
+from retomada import DiarioExecucao, carregar_ou_sortear_amostra, ids_no_csv
+from carregador_redacoes import iterar_redacoes_tema, amostra_reservatorio
+from motor_avaliacao import Estrategia, MotorAvaliacao, AgendadorPorRedacao
+from destinos_resultado import DestinoCSV, DestinoParquet, PARQUET_DISPONIVEL
+
+# Servidores, cache, limites de requisições, faixas de num_ctx e hedge ficam
+# em config_avaliacao.py, comuns ao uni-agente
 MODEL_NAME = "gemma3:12b"
 
+# Para retomar uma execução interrompida, informe o carimbo de data/hora dela
+# (ex.: "20250614_153000"). A amostra salva é reaproveitada e só as redações
+# ausentes do diário de concluídas são avaliadas e acrescentadas ao CSV.
+# None inicia uma nova execução.
+RETOMAR_EXECUCAO = None
+
+# Semente do sorteio da amostra (None = sorteio não reprodutível)
+SEMENTE_AMOSTRA = None
+
+# Além do CSV, grava os resultados em Parquet tipado (requer pyarrow). As linhas
+# vão para o disco em lote a cada LINHAS_POR_CHECKPOINT redações ou
+# INTERVALO_CHECKPOINT segundos, o que vier primeiro.
+SALVAR_PARQUET = True
+LINHAS_POR_CHECKPOINT = 20
+INTERVALO_CHECKPOINT = 30.0
+
+# Número de redações avaliadas simultaneamente (1 = processamento sequencial).
+# O CSV é sempre escrito na ordem da amostra, independente da ordem de conclusão.
+NUM_WORKERS = 4
+
+# Envia o esquema JSON de cada agente no campo "format" do Ollama, que passa a
+# restringir a geração a JSON válido nesse formato (requer Ollama >= 0.5)
+USAR_SAIDA_ESTRUTURADA = True
+
+# Ordem de agendamento das chamadas:
+#   "redacao"     - cada redação passa por C1–C5 e pelo agregador antes da próxima
+#   "competencia" - todas as redações passam por C1, depois por C2, ..., e o
+#                   agregador por último; o system prompt se repete entre chamadas
+#                   seguidas e o prefixo fica no cache do servidor
+MODO_AGENDAMENTO = "redacao"
+
+# Modo de envio da redação:
+#   "independente" - cada agente recebe a redação completa em uma chamada própria
+#   "sessao"       - a redação é enviada uma vez em uma conversa (/api/chat) e
+#                    C1–C5 e o agregador são turnos seguintes dessa conversa.
+#                    Ignora MODO_AGENDAMENTO (cada conversa é uma redação)
+MODO_CONTEXTO = "independente"
+
+SISTEMA_SESSAO = """Você é a banca avaliadora de redações do ENEM. A redação será enviada uma única vez, na primeira mensagem.
+Em cada mensagem seguinte, um avaliador diferente pedirá sua análise da mesma redação; responda a cada pedido seguindo somente as instruções daquele avaliador."""
+
+# Tempos de processamento do prompt de cada execução, por modo e agente
+ARQUIVO_COMPARACAO_AGENDAMENTO = "comparacao_agendamento.csv"
+
+# Chamada ao agregador:
+#   "sempre"   - toda redação passa pelo agregador
+#   "seletivo" - as notas de C1–C5 e o total (soma) são usados direto, e o
+#                agregador só é chamado quando alguma das VERIFICACOES_AGREGADOR
+#                falha. O CSV registra se o agregador rodou e por quê.
+MODO_AGREGADOR = "sempre"
+VERIFICACOES_AGREGADOR = ["falha_agente", "nivel_enem", "contradicao"]
+
+# No modo seletivo, gera depois da avaliação o diagnóstico e as dicas das
+# redações que dispensaram o agregador, em diagnosticos_<execução>.jsonl.
+# Só CAMPOS_DIAGNOSTICO são pedidos ao agregador, com saída limitada a
+# NUM_PREDICT_DIAGNOSTICO tokens, já que as notas não mudam.
+DIAGNOSTICO_ADIADO = False
+CAMPOS_DIAGNOSTICO = ["diagnostico_geral", "dicas_praticas"]
+NUM_PREDICT_DIAGNOSTICO = 1024
+
+# Reparo de respostas: se a resposta de um agente vier sem nota ou justificativa
+# válida (JSON cortado, nota fora de 0–200), só o que faltou é pedido de novo em
+# um prompt curto, até MAX_REPAROS vezes, em vez de a competência virar nota 0.
+# Vale também para os campos do agregador; se a nota final dele continuar
+# inválida, ela é a soma de C1–C5 e a linha traz AGREGADOR em falhas_agente.
+# NUM_PREDICT_REPARO limita a saída de cada campo pedido.
+MAX_REPAROS = 1
+NUM_PREDICT_REPARO = {"nota": 16, "justificativa": 384}
+NUM_PREDICT_REPARO_AGREGADOR = {
+    **{f"C{i}": 400 for i in range(1, 6)},
+    "nota_final": 16,
+    "diagnostico_geral": 384,
+    "dicas_praticas": 512,
+}
+
+# Níveis de nota por competência no ENEM
+NIVEIS_ENEM = {0, 40, 80, 120, 160, 200}
+
+# Termos que, na justificativa, contradizem uma nota alta (>= 160) ou baixa (<= 40)
+TERMOS_NOTA_BAIXA = ["insuficiente", "precário", "precária", "não atende", "fuga ao tema", "inexistente"]
+TERMOS_NOTA_ALTA = ["excelente", "plenamente", "sem desvios", "excelente domínio", "completa e detalhada"]
+
 REGRA_VERIFICACAO = '''REGRA DE VERIFICAÇÃO OBRIGATÓRIA
 
 Antes de finalizar sua resposta, verifique rigorosamente:
@@ -184,153 +277,306 @@ Retorne EXCLUSIVAMENTE no seguinte formato:
 '''
 }
 
+COMPETENCIAS = ["C1", "C2", "C3", "C4", "C5"]
+CAMPOS_COMPETENCIA = ["nota", "justificativa"]
+CAMPOS_AGREGADOR = COMPETENCIAS + ["nota_final", "diagnostico_geral", "dicas_praticas"]
+
+ESQUEMA_AGREGADOR = {
+    "type": "object",
+    "properties": {
+        **{f"C{i}": ESQUEMA_COMPETENCIA for i in range(1, 6)},
+        "nota_final": {"type": "integer", "minimum": 0, "maximum": 1000},
+        "diagnostico_geral": {"type": "string"},
+        "dicas_praticas": {
+            "type": "object",
+            "properties": {f"C{i}": {"type": "string"} for i in range(1, 6)},
+            "required": [f"C{i}" for i in range(1, 6)],
+        },
+    },
+    "required": ["C1", "C2", "C3", "C4", "C5", "nota_final", "diagnostico_geral", "dicas_praticas"],
+}
 
-async def call_ollama_simple(prompt: str, system_prompt: str) -> tuple:
-    """Chama Ollama e retorna (sucesso, resposta_texto)"""
-    payload = {
-        "model": MODEL_NAME,
-        "prompt": prompt,
-        "system": system_prompt,
-        "stream": True,
-        "temperature": 0.1
-    }
-
-    try:
-        async with httpx.AsyncClient(timeout=None) as client:
-            result = ""
+ESQUEMAS = {
+    "C1": ESQUEMA_COMPETENCIA,
+    "C2": ESQUEMA_COMPETENCIA,
+    "C3": ESQUEMA_COMPETENCIA,
+    "C4": ESQUEMA_COMPETENCIA,
+    "C5": ESQUEMA_COMPETENCIA,
+    "AGREGADOR": ESQUEMA_AGREGADOR,
+}
 
-            async with client.stream(
-                "POST",
-                OLLAMA_URL,
-                json=payload
-            ) as response:
+# Limite de tokens gerados por agente (options.num_predict)
+NUM_PREDICT = {
+    "C1": 512,
+    "C2": 512,
+    "C3": 512,
+    "C4": 512,
+    "C5": 512,
+    "AGREGADOR": 2048,
+}
 
-                async for line in response.aiter_lines():
-                    if not line:
-                        continue
+# Orçamento de tokens (estimados localmente) de system prompt + prompt por
+# agente. Acima dele, as justificativas enviadas ao agregador são compactadas
+# e depois cortadas; só em último caso o meio da redação é removido.
+ORCAMENTO_TOKENS = {
+    "C1": 2048,
+    "C2": 2048,
+    "C3": 2048,
+    "C4": 2048,
+    "C5": 2048,
+    "AGREGADOR": 3072,
+}
 
-                    if line.startswith("data: "):
-                        line = line[6:]
+construtor_prompt = ConstrutorPrompt(ORCAMENTO_TOKENS, SYSTEM_PROMPTS)
+reparador = ReparadorRespostas()
 
-                    try:
-                        obj = json.loads(line)
-                    except:
-                        continue
 
-                    token = obj.get("response")
-                    if token:
-                        result += token
+async def call_ollama_simple(cliente: ClienteOllama, prompt: str, agente: str, redacao_id: str = None,
+                             esquema: dict = None, num_predict: int = None) -> tuple:
+    """Chama Ollama com o system prompt do agente e retorna (sucesso, resposta_texto)
 
-                    if obj.get("done"):
-                        break
+    `esquema` e `num_predict` substituem o esquema e o limite de saída do agente.
+    """
+    extras = {"options": {"num_predict": num_predict or NUM_PREDICT[agente], "temperature": 0.1}}
+    if USAR_SAIDA_ESTRUTURADA:
+        extras["format"] = esquema or ESQUEMAS[agente]
+    return await cliente.gerar(
+        MODEL_NAME, prompt, SYSTEM_PROMPTS[agente],
+        parar_em_json=True, rotulo=agente, redacao_id=redacao_id, **extras
+    )
 
-        return True, result.strip()
 
-    except Exception as e:
-        return False, f"Erro de conexão: {e}"
+def extrair_resultado_agregador(resposta_json_str: str) -> tuple:
+    """Separa a resposta do agregador em (campos válidos normalizados, campos faltantes ou inválidos)
 
+    C1–C5 só valem com nota (0–200) e justificativa; a nota final, de 0 a 1000.
+    """
+    return validar_campos(extrair_campos(resposta_json_str, CAMPOS_AGREGADOR), CAMPOS_AGREGADOR)
 
-def extrair_nota_justificativa(resposta_json_str: str) -> dict:
-    """Extrai nota e justificativa da resposta JSON"""
-    try:
-        # Remove markdown se houver
-        resposta_json_str = resposta_json_str.strip()
-        if resposta_json_str.startswith("```"):
-            lines = resposta_json_str.split("\n")
-            resposta_json_str = "\n".join(lines[1:-1])
-        
-        dados = json.loads(resposta_json_str)
-        return {
-            "nota": int(dados.get("nota", 0)),
-            "justificativa": dados.get("justificativa", "")
-        }
-    except Exception as e:
-        return {"nota": 0, "justificativa": f"Erro ao processar: {str(e)}"}
 
+async def call_ollama_sessao(cliente: ClienteOllama, mensagens: list, agente: str, url: str,
+                             redacao_id: str = None) -> tuple:
+    """Envia o próximo turno da conversa de uma redação; retorna (sucesso, resposta_texto)"""
+    extras = {"options": {"num_predict": NUM_PREDICT[agente], "temperature": 0.1}}
+    if USAR_SAIDA_ESTRUTURADA:
+        extras["format"] = ESQUEMAS[agente]
+    return await cliente.conversar(
+        MODEL_NAME, mensagens, parar_em_json=True, rotulo=agente, url=url, redacao_id=redacao_id, **extras
+    )
 
-def extrair_resultado_agregador(resposta_json_str: str) -> dict:
-    """Extrai resultado completo do agregador"""
-    try:
-        resposta_json_str = resposta_json_str.strip()
-        if resposta_json_str.startswith("```"):
-            lines = resposta_json_str.split("\n")
-            resposta_json_str = "\n".join(lines[1:-1])
-        
-        dados = json.loads(resposta_json_str)
-        return {
-            "nota_final": int(dados.get("nota_final", 0)),
-            "diagnostico_geral": dados.get("diagnostico_geral", ""),
-            "dicas_praticas": dados.get("dicas_praticas", {})
-        }
-    except Exception as e:
-        return {
-            "nota_final": 0,
-            "diagnostico_geral": f"Erro ao processar agregador: {str(e)}",
-            "dicas_praticas": {}
-        }
 
+async def avaliar_competencia(cliente: ClienteOllama, redacao_texto: str, key: str, redacao_id: str) -> tuple:
+    """Avalia uma competência com o agente correspondente; retorna (sucesso, {nota, justificativa, falha})
 
-async def avaliar_redacao(redacao_texto: str, tema: str, redacao_id: str) -> dict:
-    """Avalia uma redação completa usando os 5 agentes + agregador"""
-    print(f"\n Avaliando redação ID: {redacao_id}")
+    "falha" marca a nota 0 que não veio do modelo (chamada ou resposta sem
+    campos válidos mesmo após o reparo).
+    """
+    prompt = construtor_prompt.montar(
+        key,
+        lambda texto, _: f"Avalie tecnicamente a redação abaixo e responda nota e justificativa.\n\nREDAÇÃO:\n{texto}",
+        redacao_texto, redacao_id=redacao_id
+    )
+    ok, resp_text = await call_ollama_simple(cliente, prompt, key, redacao_id)
     
-    resultados = {}
+    if not ok:
+        print(f"    [{redacao_id}] Competência {key[1]} concluída: erro")
+        return False, {"nota": 0, "justificativa": f"Erro: {resp_text}", "falha": True}
     
-    # Avalia cada competência
-    for i, key in enumerate(["C1", "C2", "C3", "C4", "C5"], start=1):
-        print(f"    Competência {i}...", end=" ", flush=True)
-        
-        prompt = f"Avalie tecnicamente a redação abaixo e responda nota e justificativa.\n\nREDAÇÃO:\n{redacao_texto}"
-        ok, resp_text = await call_ollama_simple(prompt, SYSTEM_PROMPTS[key])
-        
-        if not ok:
-            resultados[key] = {"nota": 0, "justificativa": f"Erro: {resp_text}"}
-        else:
-            resultado = extrair_nota_justificativa(resp_text)
-            resultados[key] = resultado
-            print(f" (Nota: {resultado['nota']})")
+    ok, resultado = await validar_competencia(cliente, key, resp_text, redacao_id, prompt=prompt)
+    resultado["falha"] = not ok
+    print(f"    [{redacao_id}] Competência {key[1]} concluída (Nota: {resultado['nota']})")
+    return ok, resultado
+
+
+async def validar_competencia(cliente: ClienteOllama, key: str, resp_text: str, redacao_id: str,
+                              prompt: str = None, mensagens: list = None, url: str = None) -> tuple:
+    """Valida nota e justificativa da resposta de um agente e pede de novo só o que faltar
+
+    O reparo repete o `prompt` (ou a conversa em `mensagens`) com o pedido
+    dos campos no fim. Retorna (sucesso, {nota, justificativa}); com campos
+    reparados, o dicionário traz também "reparo". Se o reparo não resolver,
+    a nota fica 0 com justificativa "Erro: ...", como nas falhas de chamada.
+    """
+    validos, invalidos = validar_campos(extrair_campos(resp_text, CAMPOS_COMPETENCIA), CAMPOS_COMPETENCIA)
+    reparados = list(invalidos)
+    for _ in range(MAX_REPAROS):
+        if not invalidos:
+            break
+        print(f"    [{redacao_id}] Competência {key[1]}: reparando {', '.join(invalidos)}")
+        validos.update(await reparador.reparar(
+            cliente, MODEL_NAME, key, invalidos, redacao_id,
+            sistema=SYSTEM_PROMPTS[key], prompt=prompt, mensagens=mensagens, url=url,
+            resposta_original=resp_text, validos=validos,
+            esquema=esquema_parcial(ESQUEMA_COMPETENCIA, invalidos) if USAR_SAIDA_ESTRUTURADA else None,
+            num_predict=sum(NUM_PREDICT_REPARO[c] for c in invalidos),
+        ))
+        invalidos = [c for c in CAMPOS_COMPETENCIA if c not in validos]
     
-    # Prepara consolidado para o agregador
-    consolidado = "\n\n".join([
+    if invalidos:
+        return False, {"nota": 0, "justificativa": f"Erro: resposta sem {' e '.join(invalidos)} válida"}
+    if reparados:
+        validos["reparo"] = "+".join(reparados)
+    return True, validos
+
+
+def consolidar_avaliacoes(resultados: dict) -> str:
+    """Texto com nota e justificativa de C1–C5 enviado ao agregador"""
+    return "\n\n".join([
         f"--- Competência {i} ---\nNota: {resultados[f'C{i}']['nota']}\nJustificativa: {resultados[f'C{i}']['justificativa']}"
         for i in range(1, 6)
     ])
-    
-    # Chama o agregador
-    print(f"   Agregador...", end=" ", flush=True)
-    prompt_agregador = f"""REDAÇÃO ORIGINAL:
-{redacao_texto}
+
+
+def verificar_consistencia(resultados: dict, verificacoes: list = None) -> list:
+    """Verificações que falharam nos resultados de C1–C5, no formato 'C3:nivel_enem'"""
+    verificacoes = VERIFICACOES_AGREGADOR if verificacoes is None else verificacoes
+    motivos = []
+    for key in COMPETENCIAS:
+        nota = resultados[key]["nota"]
+        justificativa = str(resultados[key]["justificativa"]).lower()
+        falhou = {
+            # Chamada ou JSON com erro: a nota 0 não veio do modelo. Notas fora
+            # de 0–200 já são rejeitadas na validação e também caem aqui.
+            "falha_agente": resultados[key].get("falha", False),
+            "nivel_enem": nota not in NIVEIS_ENEM,
+            "contradicao": (nota >= 160 and any(t in justificativa for t in TERMOS_NOTA_BAIXA))
+                           or (nota <= 40 and any(t in justificativa for t in TERMOS_NOTA_ALTA)),
+        }
+        motivos += [f"{key}:{v}" for v in verificacoes if falhou.get(v)]
+    return motivos
+
+
+def precisa_agregador(resultados: dict, redacao_id: str) -> list:
+    """Motivos para chamar o agregador ([] no modo "sempre"), ou None se ele pode ser dispensado"""
+    if MODO_AGREGADOR != "seletivo":
+        return []
+    motivos = verificar_consistencia(resultados)
+    if motivos:
+        print(f"    [{redacao_id}] Agregador necessário: {', '.join(motivos)}")
+        return motivos
+    return None
+
+
+def montar_prompt_agregador(redacao_texto: str, resultados: dict, redacao_id: str = None) -> str:
+    """Prompt do agregador: redação original e avaliações consolidadas de C1–C5,
+    dentro do orçamento de tokens do agregador"""
+    def formatar(texto: str, justificativas: dict) -> str:
+        avaliacoes = {
+            key: {"nota": resultados[key]["nota"], "justificativa": justificativas[key]} for key in COMPETENCIAS
+        }
+        return f"""REDAÇÃO ORIGINAL:
+{texto}
 
 AVALIAÇÕES (C1 a C5):
-{consolidado}
+{consolidar_avaliacoes(avaliacoes)}
 
 Gere o boletim final com nota total e dicas práticas.
 """
-    ok, resp_agregador = await call_ollama_simple(prompt_agregador, SYSTEM_PROMPTS["AGREGADOR"])
     
-    # Salva as notas originais dos agentes individuais
+    justificativas = {key: resultados[key]["justificativa"] for key in COMPETENCIAS}
+    return construtor_prompt.montar("AGREGADOR", formatar, redacao_texto, justificativas, redacao_id)
+
+
+async def agregar(cliente: ClienteOllama, redacao_texto: str, resultados: dict, redacao_id: str) -> dict:
+    """Chama o agregador sobre os resultados de C1–C5 e completa o dicionário de resultados
+
+    No modo seletivo, o agregador só é chamado se alguma verificação falhar.
+    """
+    motivos = precisa_agregador(resultados, redacao_id)
+    if motivos is None:
+        return dispensar_agregador(resultados, redacao_id)
+    
+    # Chama o agregador
+    prompt_agregador = montar_prompt_agregador(redacao_texto, resultados, redacao_id)
+    ok, resp_agregador = await call_ollama_simple(cliente, prompt_agregador, "AGREGADOR", redacao_id)
+    agregador = await validar_agregador(cliente, resp_agregador, redacao_id, prompt=prompt_agregador) if ok else None
+    
+    return aplicar_agregador(resultados, agregador, redacao_id, motivos)
+
+
+async def validar_agregador(cliente: ClienteOllama, resp_text: str, redacao_id: str,
+                           prompt: str = None, mensagens: list = None, url: str = None) -> dict:
+    """Campos válidos da resposta do agregador, pedindo de novo só os faltantes ou inválidos
+
+    Funciona como validar_competencia. Com campos pedidos de novo, o
+    dicionário traz também "reparo"; um campo que continuar inválido fica fora.
+    """
+    validos, invalidos = extrair_resultado_agregador(resp_text)
+    reparados = list(invalidos)
+    for _ in range(MAX_REPAROS):
+        if not invalidos:
+            break
+        print(f"    [{redacao_id}] Agregador: reparando {', '.join(invalidos)}")
+        validos.update(await reparador.reparar(
+            cliente, MODEL_NAME, "AGREGADOR", invalidos, redacao_id,
+            sistema=SYSTEM_PROMPTS["AGREGADOR"], prompt=prompt, mensagens=mensagens, url=url,
+            resposta_original=resp_text, validos=validos,
+            esquema=esquema_parcial(ESQUEMA_AGREGADOR, invalidos) if USAR_SAIDA_ESTRUTURADA else None,
+            num_predict=min(NUM_PREDICT["AGREGADOR"], sum(NUM_PREDICT_REPARO_AGREGADOR[c] for c in invalidos)),
+        ))
+        invalidos = [c for c in CAMPOS_AGREGADOR if c not in validos]
+    
+    if reparados:
+        validos["reparo"] = "+".join(reparados)
+    return validos
+
+
+def copiar_agentes_individuais(resultados: dict):
+    """Salva as notas originais dos agentes individuais antes de qualquer validação"""
     resultados["agentes_individuais"] = {}
     for i in range(1, 6):
         comp_key = f"C{i}"
         resultados["agentes_individuais"][comp_key] = {
             "nota": resultados[comp_key]["nota"],
-            "justificativa": resultados[comp_key]["justificativa"]
+            "justificativa": resultados[comp_key]["justificativa"],
+            "falha": resultados[comp_key].get("falha", False),
         }
+
+
+def dispensar_agregador(resultados: dict, redacao_id: str) -> dict:
+    """Resultados consistentes: nota final é a soma de C1–C5, sem chamar o agregador"""
+    copiar_agentes_individuais(resultados)
+    resultados["nota_final"] = sum(resultados[f"C{i}"]["nota"] for i in range(1, 6))
+    resultados["diagnostico_geral"] = ""
+    resultados["dicas_praticas"] = {}
+    resultados["agregador_executado"] = False
+    resultados["motivos_agregador"] = ""
     
-    if ok:
-        resultado_agregador = extrair_resultado_agregador(resp_agregador)
-        
+    print(f"    [{redacao_id}] Agregador dispensado - Nota Final (soma C1–C5): {resultados['nota_final']}/1000")
+    
+    return resultados
+
+
+def aplicar_agregador(resultados: dict, agregador: dict, redacao_id: str, motivos: list = ()) -> dict:
+    """Combina os resultados de C1–C5 com os campos válidos do agregador (ou usa a soma, se ele falhar)
+
+    `agregador` é None se a chamada falhou. Cada competência que o agregador
+    devolveu válida substitui a do agente, e a nota final é a soma das cinco
+    notas resultantes, como o prompt do agregador exige. Se a chamada falhou
+    ou a nota final do agregador não veio válida nem com o reparo, o
+    resultado fica marcado em "falha_agregador".
+    """
+    copiar_agentes_individuais(resultados)
+    resultados["agregador_executado"] = True
+    resultados["motivos_agregador"] = ",".join(motivos)
+    resultados["falha_agregador"] = agregador is None or "nota_final" not in agregador
+    if agregador is not None and agregador.get("reparo"):
+        resultados["reparo_agregador"] = agregador["reparo"]
+    
+    if agregador is not None:
         # Sobrescreve as notas e justificativas dos agentes com as validadas pelo agregador
-        for i in range(1, 6):
-            comp_key = f"C{i}"
-            if comp_key in resultado_agregador:
-                # Usa nota e justificativa validadas pelo agregador
-                resultados[comp_key]["nota"] = resultado_agregador[comp_key].get("nota", resultados[comp_key]["nota"])
-                resultados[comp_key]["justificativa"] = resultado_agregador[comp_key].get("justificativa", resultados[comp_key]["justificativa"])
+        for comp_key in COMPETENCIAS:
+            if comp_key in agregador:
+                resultados[comp_key]["nota"] = agregador[comp_key]["nota"]
+                resultados[comp_key]["justificativa"] = agregador[comp_key]["justificativa"]
         
-        resultados["nota_final"] = resultado_agregador.get("nota_final", sum(resultados[f"C{i}"]["nota"] for i in range(1, 6)))
-        resultados["diagnostico_geral"] = resultado_agregador.get("diagnostico_geral", "")
-        resultados["dicas_praticas"] = resultado_agregador.get("dicas_praticas", {})
+        soma = sum(resultados[key]["nota"] for key in COMPETENCIAS)
+        nota_final = agregador.get("nota_final")
+        if nota_final is not None and nota_final != soma:
+            print(f"    [{redacao_id}] Agregador: nota final {nota_final} difere da soma de C1–C5 ({soma}); vale a soma")
+        resultados["nota_final"] = soma
+        resultados["diagnostico_geral"] = agregador.get("diagnostico_geral", "")
+        resultados["dicas_praticas"] = agregador.get("dicas_praticas", {})
     else:
         # Se agregador falhar, calcula nota final manualmente
         resultados["nota_final"] = sum(resultados[f"C{i}"]["nota"] for i in range(1, 6))
@@ -338,37 +584,84 @@ Gere o boletim final com nota total e dicas práticas.
         resultados["dicas_praticas"] = {f"C{i}": "" for i in range(1, 6)}
 
     
-    print(f" Nota Final dos Agentes: {resultados['nota_final']}/1000\n")
+    print(f"    [{redacao_id}] Agregador - Nota Final dos Agentes: {resultados['nota_final']}/1000")
     
     return resultados
 
 
-def carregar_redacoes(pasta_conjunto: Path, num_redacoes: int = 200) -> list:
-    """Carrega todas as redações de todos os arquivos JSON e retorna uma amostra"""
-    todas_redacoes = []
+async def avaliar_redacao(cliente: ClienteOllama, redacao_texto: str, tema: str, redacao_id: str) -> dict:
+    """Avalia uma redação completa usando os 5 agentes + agregador"""
+    print(f"\n Avaliando redação ID: {redacao_id}")
+    
+    # Avalia as cinco competências em paralelo; só o agregador depende de todas
+    avaliacoes = await asyncio.gather(*(
+        avaliar_competencia(cliente, redacao_texto, key, redacao_id) for key in COMPETENCIAS
+    ))
+    resultados = {key: resultado for key, (_, resultado) in zip(COMPETENCIAS, avaliacoes)}
     
-    # Lista todos os arquivos JSON
-    arquivos_json = sorted(pasta_conjunto.glob("tema-*.json"))
+    return await agregar(cliente, redacao_texto, resultados, redacao_id)
+
+
+async def avaliar_redacao_sessao(cliente: ClienteOllama, redacao_texto: str, tema: str, redacao_id: str) -> dict:
+    """Avalia uma redação em uma única conversa (/api/chat) com o mesmo servidor
+
+    A redação é enviada só no primeiro turno, junto com as instruções de C1;
+    C2–C5 e o agregador são turnos seguintes da mesma conversa. Como cada
+    requisição repete o histórico anterior, o servidor reaproveita o prefixo já
+    processado e a redação é codificada uma vez em vez de seis.
+    """
+    print(f"\n Avaliando redação ID: {redacao_id} (sessão)")
     
-    print(f"Encontrados {len(arquivos_json)} arquivos JSON")
+    url = cliente.escolher_url()
+    mensagens = [{"role": "system", "content": SISTEMA_SESSAO}]
+    resultados = {}
     
-    for arquivo in arquivos_json:
-        try:
-            with open(arquivo, 'r', encoding='utf-8') as f:
-                redacoes = json.load(f)
-                for redacao in redacoes:
-                    redacao['arquivo_origem'] = arquivo.name
-                    todas_redacoes.append(redacao)
-        except Exception as e:
-            print(f"Erro ao carregar {arquivo.name}: {e}")
+    for key in COMPETENCIAS:
+        if key == "C1":
+            conteudo = f"REDAÇÃO:\n{redacao_texto}\n\n{SYSTEM_PROMPTS[key]}\nAvalie tecnicamente a redação acima e responda nota e justificativa."
+        else:
+            conteudo = f"{SYSTEM_PROMPTS[key]}\nAvalie tecnicamente a mesma redação e responda nota e justificativa."
+        mensagens.append({"role": "user", "content": conteudo})
+        
+        ok, resp_text = await call_ollama_sessao(cliente, mensagens, key, url, redacao_id)
+        if not ok:
+            resultados[key] = {"nota": 0, "justificativa": f"Erro: {resp_text}", "falha": True}
+            print(f"    [{redacao_id}] Competência {key[1]} concluída: erro")
+        else:
+            ok, resultados[key] = await validar_competencia(
+                cliente, key, resp_text, redacao_id, mensagens=mensagens, url=url
+            )
+            resultados[key]["falha"] = not ok
+            print(f"    [{redacao_id}] Competência {key[1]} concluída (Nota: {resultados[key]['nota']})")
+        # O histórico leva a resposta já validada, sem o texto quebrado da original
+        resposta = {c: resultados[key][c] for c in CAMPOS_COMPETENCIA}
+        mensagens.append({"role": "assistant", "content": json.dumps(resposta, ensure_ascii=False)})
+    
+    motivos = precisa_agregador(resultados, redacao_id)
+    if motivos is None:
+        return dispensar_agregador(resultados, redacao_id)
     
-    print(f"Total de redações carregadas: {len(todas_redacoes)}")
+    mensagens.append({"role": "user", "content": f"""{SYSTEM_PROMPTS["AGREGADOR"]}
+A redação original é a mesma avaliada acima.
+
+AVALIAÇÕES (C1 a C5):
+{consolidar_avaliacoes(resultados)}
+
+Gere o boletim final com nota total e dicas práticas.
+"""})
+    ok, resp_agregador = await call_ollama_sessao(cliente, mensagens, "AGREGADOR", url, redacao_id)
+    agregador = await validar_agregador(cliente, resp_agregador, redacao_id, mensagens=mensagens, url=url) if ok else None
     
-    # Seleciona amostra aleatória (limitada ao número solicitado)
-    tamanho_amostra = min(num_redacoes, len(todas_redacoes))
-    amostra = random.sample(todas_redacoes, tamanho_amostra)
+    return aplicar_agregador(resultados, agregador, redacao_id, motivos)
+
+
+def carregar_redacoes(pasta_conjunto: Path, num_redacoes: int = 200, semente: int = None) -> list:
+    """Percorre as redações de todos os arquivos JSON em streaming e retorna uma amostra"""
+    # Amostragem por reservatório: só a amostra fica em memória, qualquer que seja o corpus
+    amostra, total = amostra_reservatorio(iterar_redacoes_tema(pasta_conjunto), num_redacoes, semente)
+    print(f"Total de redações lidas: {total}")
     
-    percentual = (tamanho_amostra / len(todas_redacoes)) * 100
+    percentual = (len(amostra) / total) * 100 if total else 0.0
     print(f"Selecionadas {len(amostra)} redações ({percentual:.1f}% do total)\n")
     
     return amostra
@@ -396,6 +689,294 @@ def extrair_notas_originais(redacao: dict) -> dict:
     return notas
 
 
+def montar_linha(redacao: dict, resultado_agentes: dict) -> dict:
+    """Monta a linha do CSV com notas originais, notas dos agentes e diferenças"""
+    redacao_id = redacao.get('id', 'N/A')
+    arquivo_origem = redacao.get('arquivo_origem', 'N/A')
+    tema = redacao['tema']
+    nota_original_total = float(redacao['nota'])
+    notas_originais = extrair_notas_originais(redacao)
+    
+    # Calcula diferenças
+    row = {
+        'redacao_id': redacao_id,
+        'arquivo_origem': arquivo_origem,
+        'tema': tema[:100],  # Limita tamanho
+    }
+    
+    # Notas originais (do dataset)
+    for i in range(1, 6):
+        comp_key = f"C{i}"
+        row[f'nota_original_{comp_key}'] = notas_originais.get(comp_key, 0)
+    row['nota_original_total'] = nota_original_total
+    
+    # Notas dos agentes INDIVIDUAIS
+    agentes_individuais = resultado_agentes.get('agentes_individuais', {})
+    nota_individual_total = 0
+    for i in range(1, 6):
+        comp_key = f"C{i}"
+        nota_individual = agentes_individuais.get(comp_key, {}).get('nota', 0)
+        row[f'nota_agente_individual_{comp_key}'] = nota_individual
+        nota_individual_total += nota_individual
+    row['nota_agente_individual_total'] = nota_individual_total
+    
+    # Notas VALIDADAS pelo AGREGADOR
+    for i in range(1, 6):
+        comp_key = f"C{i}"
+        row[f'nota_agregador_validada_{comp_key}'] = resultado_agentes[comp_key]['nota']
+    row['nota_agregador_validada_total'] = resultado_agentes['nota_final']
+    
+    # Diferenças (Original vs Agregador Validado)
+    for i in range(1, 6):
+        comp_key = f"C{i}"
+        diff = resultado_agentes[comp_key]['nota'] - notas_originais.get(comp_key, 0)
+        row[f'diferenca_{comp_key}'] = diff
+    row['diferenca_total'] = resultado_agentes['nota_final'] - nota_original_total
+    
+    # Justificativas dos agentes INDIVIDUAIS
+    for i in range(1, 6):
+        comp_key = f"C{i}"
+        row[f'justificativa_individual_{comp_key}'] = agentes_individuais.get(comp_key, {}).get('justificativa', '')
+    
+    # Justificativas VALIDADAS pelo AGREGADOR
+    for i in range(1, 6):
+        comp_key = f"C{i}"
+        row[f'justificativa_agregador_{comp_key}'] = resultado_agentes[comp_key]['justificativa']
+    
+    # Diagnóstico e dicas do AGREGADOR
+    row['diagnostico_geral'] = resultado_agentes.get('diagnostico_geral', '')
+    dicas = resultado_agentes.get('dicas_praticas', {})
+    for i in range(1, 6):
+        comp_key = f"C{i}"
+        row[f'dica_pratica_{comp_key}'] = dicas.get(comp_key, '')
+    
+    # Se o agregador foi chamado e, no modo seletivo, quais verificações falharam
+    row['agregador_executado'] = resultado_agentes.get('agregador_executado', True)
+    row['motivos_agregador'] = resultado_agentes.get('motivos_agregador', '')
+    
+    # Campos pedidos de novo ao agente (ex.: "C3:nota") e competências cuja nota
+    # não veio do modelo (AGREGADOR: nota final sem resposta válida do
+    # agregador), para que as métricas possam excluí-las
+    reparos = [
+        f"{key}:{resultado_agentes[key]['reparo']}" for key in COMPETENCIAS if resultado_agentes[key].get('reparo')
+    ]
+    if resultado_agentes.get('reparo_agregador'):
+        reparos.append(f"AGREGADOR:{resultado_agentes['reparo_agregador']}")
+    row['reparos'] = ",".join(reparos)
+    falhas = [
+        key for key in COMPETENCIAS if agentes_individuais.get(key, {}).get('falha')
+    ]
+    if resultado_agentes.get('falha_agregador'):
+        falhas.append("AGREGADOR")
+    row['falhas_agente'] = ",".join(falhas)
+    
+    return row
+
+
+class EstrategiaMultiAgente(Estrategia):
+    """Cinco agentes de competência (C1–C5) seguidos do agregador"""
+    
+    nome = "multi-agente"
+    
+    def __init__(self, modo_contexto: str = "independente"):
+        self.modo_contexto = modo_contexto
+    
+    async def avaliar(self, cliente: ClienteOllama, redacao: dict) -> dict:
+        avaliar = avaliar_redacao_sessao if self.modo_contexto == "sessao" else avaliar_redacao
+        return await avaliar(cliente, redacao['texto'], redacao['tema'], self.id_redacao(redacao))
+    
+    def montar_linha(self, redacao: dict, resultado: dict) -> dict:
+        return montar_linha(redacao, resultado)
+
+
+class ColetorAgregador:
+    """Destino do motor que conta as chamadas ao agregador e, com `guardar_pendentes`,
+    guarda as redações que o dispensaram para o diagnóstico adiado"""
+    
+    def __init__(self, guardar_pendentes: bool = False):
+        self.guardar_pendentes = guardar_pendentes
+        self.executados = 0
+        self.dispensados = 0
+        self.pendentes = []
+    
+    def escrever(self, linha: dict, redacao: dict, resultado: dict, tempo: float):
+        if resultado.get('agregador_executado', True):
+            self.executados += 1
+            return
+        self.dispensados += 1
+        if self.guardar_pendentes:
+            self.pendentes.append((redacao, resultado))
+    
+    def resumo(self) -> str:
+        total = self.executados + self.dispensados
+        return (
+            f"Agregador ({MODO_AGREGADOR}): chamado em {self.executados} de {total} redações, "
+            f"dispensado em {self.dispensados}"
+        )
+    
+    def checkpoint(self):
+        pass
+    
+    def fechar(self):
+        pass
+
+
+async def gerar_diagnosticos_adiados(cliente: ClienteOllama, pendentes: list, arquivo: str):
+    """Chama o agregador só pelo diagnóstico e pelas dicas das redações que o dispensaram
+
+    As notas já gravadas não mudam; o resultado vai para `arquivo` (JSONL).
+    """
+    print(f"\n--- Diagnóstico adiado: {len(pendentes)} redações ---")
+    
+    async def diagnosticar(redacao: dict, resultados: dict) -> dict:
+        redacao_id = str(redacao.get('id', 'N/A'))
+        prompt = montar_prompt_agregador(redacao['texto'], resultados, redacao_id)
+        prompt += "As notas acima são finais; responda só o diagnóstico geral e as dicas práticas.\n"
+        ok, resposta = await call_ollama_simple(
+            cliente, prompt, "AGREGADOR", redacao_id,
+            esquema=esquema_parcial(ESQUEMA_AGREGADOR, CAMPOS_DIAGNOSTICO), num_predict=NUM_PREDICT_DIAGNOSTICO
+        )
+        if ok:
+            dados = validar_campos(extrair_campos(resposta, CAMPOS_DIAGNOSTICO), CAMPOS_DIAGNOSTICO)[0]
+        else:
+            dados = {"diagnostico_geral": f"Erro: {resposta}"}
+        return {
+            "redacao_id": redacao_id,
+            "diagnostico_geral": dados.get("diagnostico_geral", ""),
+            "dicas_praticas": dados.get("dicas_praticas", {}),
+        }
+    
+    registros = await asyncio.gather(*(diagnosticar(r, res) for r, res in pendentes))
+    with open(arquivo, 'a', encoding='utf-8') as f:
+        f.writelines(json.dumps(reg, ensure_ascii=False) + "\n" for reg in registros)
+    print(f"Diagnósticos salvos em: {arquivo}")
+
+
+def carregar_fase(arquivo_fase: Path) -> dict:
+    """Lê os resultados já gravados de uma fase (redacao_id -> {nota, justificativa} e, se houve, "reparo")"""
+    resultados = {}
+    if not arquivo_fase.exists():
+        return resultados
+    with open(arquivo_fase, 'r', encoding='utf-8') as f:
+        for linha in f:
+            try:
+                dados = json.loads(linha)
+            except ValueError:
+                continue  # Linha incompleta de uma execução interrompida
+            resultado = {"nota": dados['nota'], "justificativa": dados['justificativa']}
+            if dados.get('reparo'):
+                resultado["reparo"] = dados['reparo']
+            resultados[dados['redacao_id']] = resultado
+    return resultados
+
+
+class AgendadorPorCompetencia:
+    """Avalia todas as redações em C1, depois todas em C2, ..., e por fim no agregador
+
+    Chamadas seguidas usam o mesmo system prompt, que fica no cache de prompt do
+    servidor. Os resultados de cada fase são gravados em pasta_fases/<competência>.jsonl
+    à medida que chegam; ao retomar, o que já foi gravado não é reavaliado.
+    Em cada fase, no máximo `num_workers` redações são avaliadas ao mesmo tempo,
+    e um erro inesperado em uma redação vira falha só daquela competência.
+    """
+    
+    def __init__(self, pasta_fases: Path, num_workers: int = 4):
+        self.pasta_fases = pasta_fases
+        self.num_workers = max(1, num_workers)
+    
+    async def executar(self, motor: MotorAvaliacao, redacoes: list):
+        cliente = motor.cliente
+        self.pasta_fases.mkdir(exist_ok=True)
+        total = len(redacoes)
+        por_redacao = {str(r.get('id', 'N/A')): {} for r in redacoes}
+        vagas = asyncio.Semaphore(self.num_workers)
+        
+        for key in COMPETENCIAS:
+            arquivo_fase = self.pasta_fases / f"{key}.jsonl"
+            for redacao_id, resultado in carregar_fase(arquivo_fase).items():
+                if redacao_id in por_redacao:
+                    por_redacao[redacao_id][key] = resultado
+            
+            pendentes = [r for r in redacoes if key not in por_redacao[str(r.get('id', 'N/A'))]]
+            print(f"\n--- Fase {key}: {len(pendentes)} redações ({total - len(pendentes)} já avaliadas) ---")
+            
+            with open(arquivo_fase, 'a', encoding='utf-8') as f:
+                async def avaliar(redacao):
+                    redacao_id = str(redacao.get('id', 'N/A'))
+                    async with vagas:
+                        try:
+                            ok, resultado = await avaliar_competencia(cliente, redacao['texto'], key, redacao_id)
+                        except Exception as e:
+                            print(f"    [{redacao_id}] Competência {key[1]} concluída: erro inesperado ({e!r})")
+                            ok, resultado = False, {"nota": 0, "justificativa": f"Erro: {e!r}", "falha": True}
+                    por_redacao[redacao_id][key] = resultado
+                    if ok:  # Falhas não são gravadas e serão refeitas ao retomar
+                        f.write(json.dumps({"redacao_id": redacao_id, **resultado}, ensure_ascii=False) + "\n")
+                        f.flush()
+                
+                await asyncio.gather(*(avaliar(r) for r in pendentes))
+        
+        print(f"\n--- Fase AGREGADOR: {total} redações ---")
+        
+        async def agregar_redacao(idx: int, redacao: dict):
+            redacao_id = str(redacao.get('id', 'N/A'))
+            async with vagas:
+                await motor.processar(
+                    idx, redacao,
+                    avaliar=lambda: agregar(cliente, redacao['texto'], dict(por_redacao[redacao_id]), redacao_id)
+                )
+        
+        await asyncio.gather(*(agregar_redacao(idx, r) for idx, r in enumerate(redacoes)))
+
+
+def registrar_comparacao_agendamento(tempos_prompt: dict, modo: str, arquivo: str) -> str:
+    """Acrescenta os tempos de prompt desta execução ao arquivo de comparação e
+    retorna um resumo do tempo médio de prompt por modo de agendamento"""
+    campos = ['data', 'modelo', 'modo', 'agente', 'chamadas', 'com_prompt_eval',
+              'prompt_eval_ms_total', 'prompt_eval_tokens_total', 'ttft_ms_total']
+    novo = not os.path.exists(arquivo)
+    with open(arquivo, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=campos)
+        if novo:
+            writer.writeheader()
+        data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for agente, t in tempos_prompt.items():
+            writer.writerow({
+                'data': data,
+                'modelo': MODEL_NAME,
+                'modo': modo,
+                'agente': agente,
+                'chamadas': t['chamadas'],
+                'com_prompt_eval': t['com_prompt_eval'],
+                'prompt_eval_ms_total': round(t['prompt_eval_ns'] / 1e6, 1),
+                'prompt_eval_tokens_total': t['prompt_eval_count'],
+                'ttft_ms_total': round(t['ttft_s'] * 1000, 1),
+            })
+    
+    # Soma todas as execuções registradas para o modelo atual
+    totais = {}
+    with open(arquivo, 'r', newline='', encoding='utf-8') as f:
+        for linha in csv.DictReader(f):
+            if linha['modelo'] != MODEL_NAME:
+                continue
+            t = totais.setdefault(linha['modo'], [0, 0, 0.0, 0.0])
+            t[0] += int(linha['chamadas'])
+            t[1] += int(linha['com_prompt_eval'])
+            t[2] += float(linha['prompt_eval_ms_total'])
+            t[3] += float(linha['ttft_ms_total'])
+    
+    linhas = [f"Tempo de prompt por modo de agendamento ({MODEL_NAME}):"]
+    for modo_registrado, (chamadas, com_prompt_eval, prompt_ms, ttft_ms) in sorted(totais.items()):
+        prompt_medio = prompt_ms / com_prompt_eval if com_prompt_eval else 0.0
+        ttft_medio = ttft_ms / chamadas if chamadas else 0.0
+        linhas.append(
+            f"  {modo_registrado}: prompt_eval médio {prompt_medio:.0f} ms "
+            f"({com_prompt_eval} chamadas com o dado), tempo até o 1º token médio "
+            f"{ttft_medio:.0f} ms ({chamadas} chamadas)"
+        )
+    return "\n".join(linhas)
+
+
 async def main():
     print("="*80)
     print("SISTEMA DE AVALIAÇÃO AUTOMATIZADA DE REDAÇÕES - MULTI-AGENTES")
@@ -410,12 +991,29 @@ async def main():
         print(f" Pasta não encontrada: {pasta_conjunto}")
         return
     
-    # Carrega redações
-    redacoes = carregar_redacoes(pasta_conjunto, num_redacoes_processar)
-    
-    # Prepara arquivo CSV
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Arquivos da execução (reaproveitados ao retomar)
+    timestamp = RETOMAR_EXECUCAO or datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_filename = f"resultados_avaliacao_{timestamp}.csv"
+    pasta_parquet = f"resultados_avaliacao_{timestamp}.parquet"
+    arquivo_amostra = f"amostra_{timestamp}.json"
+    arquivo_diario = f"concluidas_{timestamp}.txt"
+    arquivo_metricas = f"metricas_chamadas_{timestamp}.jsonl"
+    arquivo_diagnosticos = f"diagnosticos_{timestamp}.jsonl"
+    
+    # Carrega redações (ou a amostra salva da execução retomada)
+    redacoes = carregar_ou_sortear_amostra(
+        arquivo_amostra,
+        lambda: carregar_redacoes(pasta_conjunto, num_redacoes_processar, SEMENTE_AMOSTRA)
+    )
+    
+    # Descarta as redações já concluídas; o CSV também conta, caso a execução
+    # tenha parado entre a escrita da linha e o registro no diário
+    diario = DiarioExecucao(arquivo_diario)
+    diario.incluir(ids_no_csv(csv_filename, 'redacao_id', encoding='utf-8-sig'))
+    estrategia = EstrategiaMultiAgente(MODO_CONTEXTO)
+    restantes = sum(1 for r in redacoes if estrategia.id_redacao(r) not in diario)
+    if restantes < len(redacoes):
+        print(f"Retomando execução {timestamp}: {len(redacoes) - restantes} redações já concluídas, {restantes} restantes\n")
     
     # Cabeçalhos do CSV
     fieldnames = [
@@ -469,6 +1067,12 @@ async def main():
         'dica_pratica_C3',
         'dica_pratica_C4',
         'dica_pratica_C5',
+        # Execução do AGREGADOR (MODO_AGREGADOR)
+        'agregador_executado',
+        'motivos_agregador',
+        # Reparos de respostas e competências sem nota do modelo
+        'reparos',
+        'falhas_agente',
     ]
     
     print(f"💾 Salvando resultados em: {csv_filename}\n")
@@ -476,94 +1080,68 @@ async def main():
     print("INICIANDO PROCESSAMENTO")
     print("="*80)
     
-    with open(csv_filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        # Processa cada redação
-        for idx, redacao in enumerate(redacoes, 1):
-            print(f"\n[{idx}/{len(redacoes)}] Processando...")
-            
-            # Extrai dados originais
-            redacao_id = redacao.get('id', 'N/A')
-            arquivo_origem = redacao.get('arquivo_origem', 'N/A')
-            tema = redacao['tema']
-            texto = redacao['texto']
-            nota_original_total = float(redacao['nota'])
-            notas_originais = extrair_notas_originais(redacao)
-            
-            # Avalia com os agentes
-            resultado_agentes = await avaliar_redacao(texto, tema, redacao_id)
-            
-            # Calcula diferenças
-            row = {
-                'redacao_id': redacao_id,
-                'arquivo_origem': arquivo_origem,
-                'tema': tema[:100],  # Limita tamanho
-            }
-            
-            # Notas originais (do dataset)
-            for i in range(1, 6):
-                comp_key = f"C{i}"
-                row[f'nota_original_{comp_key}'] = notas_originais.get(comp_key, 0)
-            row['nota_original_total'] = nota_original_total
-            
-            # Notas dos agentes INDIVIDUAIS
-            agentes_individuais = resultado_agentes.get('agentes_individuais', {})
-            nota_individual_total = 0
-            for i in range(1, 6):
-                comp_key = f"C{i}"
-                nota_individual = agentes_individuais.get(comp_key, {}).get('nota', 0)
-                row[f'nota_agente_individual_{comp_key}'] = nota_individual
-                nota_individual_total += nota_individual
-            row['nota_agente_individual_total'] = nota_individual_total
-            
-            # Notas VALIDADAS pelo AGREGADOR
-            for i in range(1, 6):
-                comp_key = f"C{i}"
-                row[f'nota_agregador_validada_{comp_key}'] = resultado_agentes[comp_key]['nota']
-            row['nota_agregador_validada_total'] = resultado_agentes['nota_final']
-            
-            # Diferenças (Original vs Agregador Validado)
-            for i in range(1, 6):
-                comp_key = f"C{i}"
-                diff = resultado_agentes[comp_key]['nota'] - notas_originais.get(comp_key, 0)
-                row[f'diferenca_{comp_key}'] = diff
-            row['diferenca_total'] = resultado_agentes['nota_final'] - nota_original_total
-            
-            # Justificativas dos agentes INDIVIDUAIS
-            for i in range(1, 6):
-                comp_key = f"C{i}"
-                row[f'justificativa_individual_{comp_key}'] = agentes_individuais.get(comp_key, {}).get('justificativa', '')
-            
-            # Justificativas VALIDADAS pelo AGREGADOR
-            for i in range(1, 6):
-                comp_key = f"C{i}"
-                row[f'justificativa_agregador_{comp_key}'] = resultado_agentes[comp_key]['justificativa']
-            
-            # Diagnóstico e dicas do AGREGADOR
-            row['diagnostico_geral'] = resultado_agentes.get('diagnostico_geral', '')
-            dicas = resultado_agentes.get('dicas_praticas', {})
-            for i in range(1, 6):
-                comp_key = f"C{i}"
-                row[f'dica_pratica_{comp_key}'] = dicas.get(comp_key, '')
-            
-            # Escreve no CSV
-            writer.writerow(row)
-            csvfile.flush()  # Garante que os dados sejam escritos imediatamente
-            
-            print(f"   💾 Salvo no CSV")
+    if MODO_CONTEXTO == "sessao":
+        modo = "sessao"
+        agendador = AgendadorPorRedacao(NUM_WORKERS)
+    elif MODO_AGENDAMENTO == "competencia":
+        modo = "competencia"
+        agendador = AgendadorPorCompetencia(Path(f"fases_{timestamp}"), NUM_WORKERS)
+    else:
+        modo = "redacao"
+        agendador = AgendadorPorRedacao(NUM_WORKERS)
     
+    # Tokens e tempos de cada chamada (redação, agente, servidor), um registro por linha
+    metricas = MetricasChamadas(arquivo_metricas)
+    async with criar_cliente(metricas) as cliente:
+        # As linhas chegam aos destinos na ordem da amostra, mesmo que as avaliações
+        # terminem fora de ordem. O CSV fica por último: ao retomar, um ID presente
+        # nele já foi gravado em todos os outros destinos.
+        coletor = ColetorAgregador(guardar_pendentes=MODO_AGREGADOR == "seletivo" and DIAGNOSTICO_ADIADO)
+        destinos = [coletor]
+        if SALVAR_PARQUET and PARQUET_DISPONIVEL:
+            destinos.append(DestinoParquet(pasta_parquet))
+        elif SALVAR_PARQUET:
+            print("⚠️ pyarrow não instalado: resultados só em CSV\n")
+        destinos.append(DestinoCSV(csv_filename, fieldnames, encoding='utf-8-sig'))
+        motor = MotorAvaliacao(
+            estrategia, cliente, destinos, agendador, diario,
+            linhas_por_checkpoint=LINHAS_POR_CHECKPOINT, intervalo_checkpoint=INTERVALO_CHECKPOINT
+        )
+        try:
+            try:
+                await motor.executar(redacoes)
+            finally:
+                motor.fechar()
+            # Fora do caminho das notas: só depois que todas foram gravadas
+            if coletor.pendentes:
+                await gerar_diagnosticos_adiados(cliente, coletor.pendentes, arquivo_diagnosticos)
+        finally:
+            metricas.fechar()
+        resumo_motor = motor.resumo()
+        resumo_servidores = cliente.resumo()
+        resumo_agendamento = registrar_comparacao_agendamento(
+            cliente.tempos_prompt, modo, ARQUIVO_COMPARACAO_AGENDAMENTO
+        )
     print("\n" + "="*80)
     print("PROCESSAMENTO CONCLUÍDO!")
     print("="*80)
-    print(f"\n✅ Total de redações processadas: {len(redacoes)}")
+    print(f"\n✅ Total de redações processadas: {len(diario)}/{len(redacoes)}")
+    print(resumo_motor)
+    print(coletor.resumo())
+    print(construtor_prompt.resumo())
+    print(reparador.resumo())
     print(f"📄 Resultados salvos em: {csv_filename}")
+    if SALVAR_PARQUET and PARQUET_DISPONIVEL:
+        print(f"📄 Parquet tipado em: {pasta_parquet}")
     print("\nO arquivo CSV contém:")
     print("  - Notas ORIGINAIS (prefixo: nota_original_)")
     print("  - Notas dos AGENTES (prefixo: nota_agente_)")
     print("  - DIFERENÇAS entre agentes e originais (prefixo: diferenca_)")
     print("  - Justificativas completas dos agentes")
+    print()
+    print(resumo_servidores)
+    print(metricas.resumo())
+    print(resumo_agendamento)
     print("="*80)
 
 
@@ -0,0 +1,182 @@
+import re
+import json
+
+from analise_json import extrair_campos
+from construtor_prompt import estimar_tokens, cortar
+
+NOTA_MAXIMA_COMPETENCIA = 200
+NOTA_MAXIMA_TOTAL = 1000
+
+# Campos já aceitos que são repetidos no pedido de reparo, para manter a
+# coerência entre as notas, entram cortados neste tamanho
+TOKENS_CONTEXTO_REPARO = 60
+
+def normalizar_nota(valor, maximo: int):
+    """Nota inteira entre 0 e `maximo` (aceita "120" e 120.0), ou None se for inválida"""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, str):
+        valor = valor.strip()
+    try:
+        nota = float(valor)
+    except (TypeError, ValueError):
+        return None
+    if not nota.is_integer() or not 0 <= nota <= maximo:
+        return None
+    return int(nota)
+
+
+def normalizar_campo(campo: str, valor):
+    """Valor do campo pronto para uso (notas como int), ou None se ele for inválido
+
+    "nota" vai de 0 a 200 e "nota_final" de 0 a 1000; "competencia_N" e
+    "CN" (agregador) são objetos {nota, justificativa}; "dicas_praticas" é
+    um objeto de textos; os demais campos são textos não vazios.
+    """
+    if campo == "nota":
+        return normalizar_nota(valor, NOTA_MAXIMA_COMPETENCIA)
+    if campo == "nota_final":
+        return normalizar_nota(valor, NOTA_MAXIMA_TOTAL)
+    if campo.startswith("competencia_") or re.fullmatch(r"C[1-5]", campo):
+        if not isinstance(valor, dict):
+            return None
+        nota = normalizar_campo("nota", valor.get("nota"))
+        justificativa = normalizar_campo("justificativa", valor.get("justificativa"))
+        if nota is None or justificativa is None:
+            return None
+        return {"nota": nota, "justificativa": justificativa}
+    if campo == "dicas_praticas":
+        if not isinstance(valor, dict):
+            return None
+        dicas = {k: v.strip() for k, v in valor.items() if isinstance(v, str) and v.strip()}
+        return dicas or None
+    if isinstance(valor, str) and valor.strip():
+        return valor.strip()
+    return None
+
+
+def validar_campos(dados: dict, campos) -> tuple:
+    """Separa os campos da resposta em (válidos normalizados, lista dos faltantes ou inválidos)"""
+    validos = {}
+    invalidos = []
+    for campo in campos:
+        valor = normalizar_campo(campo, dados.get(campo)) if isinstance(dados, dict) else None
+        if valor is None:
+            invalidos.append(campo)
+        else:
+            validos[campo] = valor
+    return validos, invalidos
+
+
+def esquema_parcial(esquema: dict, campos) -> dict:
+    """Esquema JSON reduzido aos campos pedidos no reparo (para o campo "format")"""
+    return {
+        "type": "object",
+        "properties": {c: esquema["properties"][c] for c in campos},
+        "required": list(campos),
+    }
+
+
+def instrucao_reparo(campos, validos: dict = None) -> str:
+    """Pedido curto dos campos que faltaram, com os já aceitos como contexto"""
+    modelo = ", ".join(f'"{c}": ...' for c in campos)
+    linhas = [
+        "ATENÇÃO: a resposta anterior para esta redação veio incompleta ou inválida nos campos: "
+        f"{', '.join(campos)}.",
+        f"Responda apenas com um objeto JSON contendo somente esses campos: {{{modelo}}}.",
+        "Notas de competência vão de 0 a 200 e a nota final de 0 a 1000.",
+    ]
+    if validos:
+        linhas.append("Campos já aceitos (não repita):")
+        for campo, valor in validos.items():
+            if isinstance(valor, dict):
+                valor = valor["nota"] if "nota" in valor else json.dumps(valor, ensure_ascii=False)
+            linhas.append(f"- {campo}: {cortar(str(valor), TOKENS_CONTEXTO_REPARO)}")
+    return "\n".join(linhas)
+
+
+class ReparadorRespostas:
+    """Pede de novo ao modelo só os campos faltantes ou inválidos de uma resposta.
+
+    O pedido repete a chamada original (prompt ou conversa) e acrescenta no
+    fim uma instrução curta com os campos que faltam; com o mesmo prefixo, o
+    servidor reaproveita o prompt já processado. A saída fica limitada ao
+    `num_predict` dos campos pedidos e, com `esquema`, ao esquema reduzido a
+    eles. Cada tentativa fica em `registros`, com os tokens estimados do
+    prefixo reaproveitado, do trecho novo do pedido, da resposta e da saída
+    de uma resposta completa (os campos aceitos mais os recuperados), que é
+    o que uma nova chamada completa teria de gerar.
+    """
+
+    def __init__(self):
+        self.registros = []
+
+    async def reparar(self, cliente, modelo: str, agente: str, campos: list, redacao_id=None, *,
+                      sistema: str = None, prompt: str = None, mensagens: list = None, url: str = None,
+                      resposta_original: str = "", validos: dict = None, esquema: dict = None,
+                      num_predict: int = 256, temperatura: float = 0.1) -> dict:
+        """Retorna os campos pedidos que vieram válidos (normalizados) na resposta do reparo"""
+        instrucao = instrucao_reparo(campos, validos)
+        extras = {"options": {"num_predict": num_predict, "temperature": temperatura}}
+        if esquema is not None:
+            extras["format"] = esquema
+        rotulo = f"{agente}:reparo"
+
+        if mensagens is not None:
+            pedido = mensagens + [
+                {"role": "assistant", "content": resposta_original},
+                {"role": "user", "content": instrucao},
+            ]
+            tokens_original = sum(estimar_tokens(m["content"]) for m in mensagens)
+            tokens_pedido = sum(estimar_tokens(m["content"]) for m in pedido)
+            ok, resposta = await cliente.conversar(
+                modelo, pedido, parar_em_json=True, rotulo=rotulo, url=url, redacao_id=redacao_id, **extras
+            )
+        else:
+            pedido = f"{prompt}\n\n{instrucao}"
+            tokens_original = estimar_tokens(sistema or "") + estimar_tokens(prompt)
+            tokens_pedido = estimar_tokens(sistema or "") + estimar_tokens(pedido)
+            ok, resposta = await cliente.gerar(
+                modelo, pedido, sistema, parar_em_json=True, rotulo=rotulo, redacao_id=redacao_id, **extras
+            )
+
+        recuperados, _ = validar_campos(extrair_campos(resposta, campos) if ok else {}, campos)
+        completa = json.dumps({**(validos or {}), **recuperados}, ensure_ascii=False)
+        self.registros.append({
+            "redacao_id": None if redacao_id is None else str(redacao_id),
+            "agente": agente,
+            "campos": list(campos),
+            "recuperados": list(recuperados),
+            "tokens_prefixo": tokens_original,
+            "tokens_pedido_novos": tokens_pedido - tokens_original,
+            "tokens_resposta": estimar_tokens(resposta) if ok else 0,
+            "tokens_saida_completa": estimar_tokens(completa),
+        })
+        return recuperados
+
+    def resumo(self) -> str:
+        """Tentativas de reparo por agente e o custo delas frente a gerar as respostas completas de novo"""
+        if not self.registros:
+            return "Reparos: nenhuma resposta precisou de reparo"
+        linhas = ["Reparos de respostas (tokens estimados):"]
+        for agente in sorted({r["agente"] for r in self.registros}):
+            regs = [r for r in self.registros if r["agente"] == agente]
+            resolvidos = sum(1 for r in regs if len(r["recuperados"]) == len(r["campos"]))
+            campos = {}
+            for r in regs:
+                for c in r["campos"]:
+                    campos[c] = campos.get(c, 0) + 1
+            linhas.append(
+                f"  {agente}: {len(regs)} tentativas, {resolvidos} resolvidas; campos pedidos: "
+                + ", ".join(f"{c} ({n})" for c, n in sorted(campos.items()))
+            )
+        prefixo = sum(r["tokens_prefixo"] for r in self.registros)
+        novos = sum(r["tokens_pedido_novos"] for r in self.registros)
+        gerados = sum(r["tokens_resposta"] for r in self.registros)
+        completa = sum(r["tokens_saida_completa"] for r in self.registros)
+        linhas.append(
+            f"  prompt: {novos} tokens novos sobre {prefixo} de prefixo igual ao da chamada original; "
+            f"saída: {gerados} tokens gerados, {gerados / completa * 100 if completa else 0:.0f}% dos ~{completa} "
+            f"de gerar as respostas completas de novo"
+        )
+        return "\n".join(linhas)
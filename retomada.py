@@ -0,0 +1,70 @@
+import os
+import csv
+import json
+
+
+def carregar_ou_sortear_amostra(caminho: str, sortear) -> list:
+    """Carrega a amostra salva em `caminho` ou chama sortear() e salva o resultado"""
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            amostra = json.load(f)
+        print(f"Amostra retomada de {caminho} ({len(amostra)} redações)")
+        return amostra
+
+    amostra = sortear()
+    # Grava em arquivo temporário e renomeia para não deixar uma amostra pela metade
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(amostra, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+    return amostra
+
+
+def ids_no_csv(caminho: str, coluna: str, encoding: str = "utf-8") -> set:
+    """IDs já presentes em um CSV de resultados (conjunto vazio se o arquivo não existir)"""
+    if not os.path.exists(caminho):
+        return set()
+    with open(caminho, "r", newline="", encoding=encoding) as f:
+        return {linha[coluna] for linha in csv.DictReader(f) if linha.get(coluna)}
+
+
+class DiarioExecucao:
+    """Diário das redações já concluídas, uma por linha, para retomar execuções.
+
+    Os IDs são gravados depois que as linhas correspondentes chegaram ao disco;
+    com `reiniciar=True` o diário anterior é descartado.
+    """
+
+    def __init__(self, caminho: str, reiniciar: bool = False):
+        self.caminho = caminho
+        self.concluidas = set()
+        if not reiniciar and os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                self.concluidas = {linha.strip() for linha in f if linha.strip()}
+        self._arquivo = open(caminho, "w" if reiniciar else "a", encoding="utf-8")
+
+    def __contains__(self, redacao_id) -> bool:
+        return str(redacao_id) in self.concluidas
+
+    def __len__(self) -> int:
+        return len(self.concluidas)
+
+    def incluir(self, ids):
+        """Marca como concluídos IDs encontrados em outra fonte (ex.: o próprio CSV)"""
+        novos = {str(redacao_id) for redacao_id in ids} - self.concluidas
+        if novos:
+            self.registrar_lote(sorted(novos))
+
+    def registrar(self, redacao_id):
+        self.registrar_lote([redacao_id])
+
+    def registrar_lote(self, ids):
+        """Registra vários IDs com uma única gravação no disco"""
+        ids = [str(redacao_id) for redacao_id in ids]
+        self.concluidas.update(ids)
+        self._arquivo.write("".join(f"{redacao_id}\n" for redacao_id in ids))
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def fechar(self):
+        self._arquivo.close()
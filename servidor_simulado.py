@@ -0,0 +1,193 @@
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PALAVRAS = (
+    "o texto apresenta domínio adequado da norma culta com poucos desvios e "
+    "repertório sociocultural pertinente ao tema mas a proposta de intervenção "
+    "carece de detalhamento do agente e do meio de execução"
+).split()
+
+
+def instancia_do_esquema(esquema: dict, rng: random.Random, palavras: int):
+    """Gera um valor que segue o esquema JSON enviado no campo "format" """
+    tipo = esquema.get("type")
+    if tipo == "object":
+        return {k: instancia_do_esquema(v, rng, palavras) for k, v in esquema.get("properties", {}).items()}
+    if tipo == "integer":
+        # Níveis do ENEM: múltiplos de 40 dentro do intervalo
+        minimo, maximo = esquema.get("minimum", 0), esquema.get("maximum", 200)
+        return rng.choice(range(minimo, maximo + 1, 40))
+    if tipo == "number":
+        return rng.uniform(esquema.get("minimum", 0), esquema.get("maximum", 1))
+    if tipo == "array":
+        return [instancia_do_esquema(esquema.get("items", {}), rng, palavras)]
+    return " ".join(rng.choices(PALAVRAS, k=palavras))
+
+
+class ServidorSimulado(ThreadingHTTPServer):
+    """Servidor que imita o streaming NDJSON do Ollama (/api/generate e /api/chat).
+
+    A resposta segue o esquema do campo "format" da requisição (ou o formato
+    nota/justificativa quando não há esquema) e é enviada em pedaços de ~4
+    caracteres, um por "token", depois de `ttft` segundos e a `tokens_por_s`.
+    `slots` imita o OLLAMA_NUM_PARALLEL: requisições além disso esperam na
+    fila. `taxa_erro` responde HTTP 500 e `taxa_json_invalido` envia um JSON
+    cortado no meio, como uma geração interrompida. `taxa_lenta` das
+    requisições gera `fator_lento` vezes mais devagar, como uma geração travada.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, porta: int, tokens_por_s: float = 50.0, ttft: float = 0.2, taxa_erro: float = 0.0,
+                 taxa_json_invalido: float = 0.0, slots: int = 4, palavras: int = 40, semente: int = None,
+                 taxa_lenta: float = 0.0, fator_lento: float = 20.0):
+        super().__init__(("127.0.0.1", porta), _Tratador)
+        self.tokens_por_s = tokens_por_s
+        self.ttft = ttft
+        self.taxa_erro = taxa_erro
+        self.taxa_json_invalido = taxa_json_invalido
+        self.taxa_lenta = taxa_lenta
+        self.fator_lento = fator_lento
+        self.slots = threading.Semaphore(slots)
+        self.palavras = palavras
+        self.rng = random.Random(semente)
+        self._trava = threading.Lock()
+        self.requisicoes = 0
+        self.canceladas = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def sortear(self, taxa: float) -> bool:
+        with self._trava:
+            return self.rng.random() < taxa
+
+    def resposta(self, payload: dict) -> str:
+        esquema = payload.get("format") if isinstance(payload.get("format"), dict) else {
+            "type": "object",
+            "properties": {"nota": {"type": "integer", "maximum": 200}, "justificativa": {"type": "string"}},
+        }
+        with self._trava:
+            texto = json.dumps(instancia_do_esquema(esquema, self.rng, self.palavras), ensure_ascii=False)
+        if self.sortear(self.taxa_json_invalido):
+            texto = texto[:len(texto) // 2]
+        return texto
+
+    def iniciar(self):
+        """Atende em uma thread e retorna o próprio servidor"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Tratador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _enviar(self, status: int, corpo: dict):
+        dados = json.dumps(corpo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _pedaco(self, obj: dict):
+        linha = (json.dumps(obj, ensure_ascii=False) + "\n").encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(linha), linha))
+        self.wfile.flush()
+
+    def do_GET(self):
+        self._enviar(200, {"version": "simulado"})
+
+    def do_POST(self):
+        servidor = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with servidor._trava:
+            servidor.requisicoes += 1
+
+        if self.path not in ("/api/generate", "/api/chat"):
+            self._enviar(404, {"error": "caminho desconhecido"})
+            return
+        if servidor.sortear(servidor.taxa_erro):
+            self._enviar(500, {"error": "erro simulado"})
+            return
+
+        chat = self.path == "/api/chat"
+        prompt = json.dumps(payload.get("messages")) if chat else payload.get("prompt", "")
+        texto = servidor.resposta(payload)
+        num_predict = payload.get("options", {}).get("num_predict") or len(texto)
+        pedacos = [texto[i:i + 4] for i in range(0, len(texto), 4)][:num_predict]
+        intervalo = 1 / servidor.tokens_por_s
+        if servidor.sortear(servidor.taxa_lenta):
+            intervalo *= servidor.fator_lento
+
+        with servidor.slots:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            inicio = time.perf_counter()
+            try:
+                time.sleep(servidor.ttft)
+                inicio_geracao = time.perf_counter()
+                for pedaco in pedacos:
+                    if chat:
+                        self._pedaco({"message": {"role": "assistant", "content": pedaco}, "done": False})
+                    else:
+                        self._pedaco({"response": pedaco, "done": False})
+                    time.sleep(intervalo)
+                fim = time.perf_counter()
+                final = {
+                    "done": True,
+                    "total_duration": int((fim - inicio) * 1e9),
+                    "load_duration": 0,
+                    "prompt_eval_count": len(prompt) // 4,
+                    "prompt_eval_duration": int(servidor.ttft * 1e9),
+                    "eval_count": len(pedacos),
+                    "eval_duration": int((fim - inicio_geracao) * 1e9),
+                }
+                final.update({"message": {"role": "assistant", "content": ""}} if chat else {"response": ""})
+                self._pedaco(final)
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # O cliente fechou o stream (ex.: parar_em_json)
+                with servidor._trava:
+                    servidor.canceladas += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor Ollama simulado para benchmarks offline")
+    parser.add_argument("--porta", type=int, default=11500)
+    parser.add_argument("--tokens-por-s", type=float, default=50.0)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-json-invalido", type=float, default=0.0)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--semente", type=int, default=None)
+    parser.add_argument("--taxa-lenta", type=float, default=0.0)
+    parser.add_argument("--fator-lento", type=float, default=20.0)
+    args = parser.parse_args()
+
+    servidor = ServidorSimulado(
+        args.porta, args.tokens_por_s, args.ttft, args.taxa_erro, args.taxa_json_invalido, args.slots,
+        semente=args.semente, taxa_lenta=args.taxa_lenta, fator_lento=args.fator_lento,
+    )
+    print(f"Servidor simulado em {servidor.url}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    servidor.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
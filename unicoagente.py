@@ -1,19 +1,69 @@
 import asyncio
-import json
-import httpx
 import os
-import csv
-import re
+
+from config_avaliacao import ESQUEMA_COMPETENCIA, criar_cliente
+from metricas_chamadas import MetricasChamadas
+from construtor_prompt import ConstrutorPrompt
+from analise_json import extrair_campos
+from reparo_respostas import ReparadorRespostas, validar_campos, esquema_parcial
+from retomada import DiarioExecucao, ids_no_csv
+from carregador_redacoes import iterar_redacoes_arquivo
+from motor_avaliacao import Estrategia, FalhaAvaliacao, MotorAvaliacao, AgendadorPorRedacao
+from destinos_resultado import DestinoCSV, DestinoJSONL, DestinoParquet, PARQUET_DISPONIVEL
 
 # --- CONFIGURAÇÕES ---
 PASTA_REDACOES = "Redações"
-PASTA_RESULTADOS = "resultados_json_OFICIAL"
 CSV_SAIDA = "resultado_completo.csv"
+# Avaliação completa e resposta bruta de cada redação, uma por linha
+JSONL_SAIDA = "resultados_uni_agente.jsonl"
+# Cópia tipada do CSV em Parquet (requer pyarrow); None desativa
+PARQUET_SAIDA = "resultado_completo.parquet"
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
+# Servidores, cache, limites de requisições, faixas de num_ctx e hedge ficam
+# em config_avaliacao.py, comuns ao multi-agente
 OLLAMA_MODEL = "gemma3:latest"
 
-os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+# Restringe a geração ao ESQUEMA_RESPOSTA e limita os tokens gerados
+USAR_SAIDA_ESTRUTURADA = True
+NUM_PREDICT = 1536
+
+# Orçamento de tokens (estimados localmente) de system prompt + redação; acima
+# dele, o meio da redação é removido
+ORCAMENTO_TOKENS = 3072
+
+# Com RETOMAR = True, as redações já registradas no diário (ou presentes no CSV)
+# são puladas e as novas linhas são acrescentadas ao CSV existente.
+RETOMAR = False
+ARQUIVO_DIARIO = "concluidas_uni_agente.txt"
+
+# Tokens e tempos de cada chamada ao modelo, um registro JSON por linha
+ARQUIVO_METRICAS = "metricas_chamadas_uni_agente.jsonl"
+
+# Redações avaliadas simultaneamente; use o mesmo valor do multi-agente para
+# comparar os dois em igualdade
+NUM_WORKERS = 4
+
+# Tentativas por redação, com espera exponencial (ESPERA_BASE * 2^n, no
+# máximo ESPERA_MAXIMA segundos) e jitter entre elas
+MAX_TENTATIVAS = 2
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 30.0
+
+# Reparo de respostas: competências sem nota ou justificativa válida, nota final
+# ou diagnóstico faltando (ex.: JSON cortado no meio) são pedidos de novo em um
+# prompt curto, só eles, até MAX_REPAROS vezes, em vez de refazer a avaliação
+# inteira. Sem nenhuma competência válida, conta como falha e vale MAX_TENTATIVAS.
+# A nota final que faltar é a soma das competências, sem nova chamada.
+MAX_REPAROS = 1
+NUM_PREDICT_REPARO = {
+    **{f"competencia_{i}": 320 for i in range(1, 6)},
+    "diagnostico_geral": 256,
+}
+
+# As linhas vão para o disco em lote a cada LINHAS_POR_CHECKPOINT redações ou
+# INTERVALO_CHECKPOINT segundos, o que vier primeiro
+LINHAS_POR_CHECKPOINT = 20
+INTERVALO_CHECKPOINT = 30.0
 
 system_prompt = """
 Você é um avaliador especialista do ENEM, capaz de analisar redações e atribuir notas às cinco competências oficiais.
@@ -45,39 +95,153 @@ Formato Obrigatório (JSON):
 }
 """
 
-def extrair_json(texto):
-    match = re.search(r"\{.*\}", texto, re.DOTALL)
-    if not match:
-        return None
+# Esquema enviado no campo "format" do Ollama (saída estruturada, Ollama >= 0.5)
+ESQUEMA_RESPOSTA = {
+    "type": "object",
+    "properties": {
+        **{f"competencia_{i}": ESQUEMA_COMPETENCIA for i in range(1, 6)},
+        "nota_final": {"type": "integer", "minimum": 0, "maximum": 1000},
+        "diagnostico_geral": {"type": "string"},
+    },
+    "required": [f"competencia_{i}" for i in range(1, 6)] + ["nota_final", "diagnostico_geral"],
+}
+
+COMPETENCIAS = [f"competencia_{i}" for i in range(1, 6)]
+CAMPOS_RESPOSTA = COMPETENCIAS + ["nota_final", "diagnostico_geral"]
+
+construtor_prompt = ConstrutorPrompt({"uni": ORCAMENTO_TOKENS}, {"uni": system_prompt})
+reparador = ReparadorRespostas()
+
+def montar_prompt(texto, redacao_id=None):
+    return construtor_prompt.montar("uni", lambda t, _: t, texto, redacao_id=redacao_id)
+
+async def avaliar_redacao(cliente, prompt, redacao_id=None):
+    extras = {"options": {"num_predict": NUM_PREDICT, "temperature": 0.1}}
+    if USAR_SAIDA_ESTRUTURADA:
+        extras["format"] = ESQUEMA_RESPOSTA
+    ok, resposta = await cliente.gerar(
+        OLLAMA_MODEL, prompt, system_prompt,
+        parar_em_json=True, rotulo="uni", redacao_id=redacao_id, **extras
+    )
+    return resposta if ok else None
+
+async def reparar_avaliacao(cliente, prompt, resposta_bruta, validos, invalidos, redacao_id=None):
+    reparados = []
+    for _ in range(MAX_REPAROS):
+        pedir = [c for c in invalidos if c != "nota_final"]
+        if not pedir:
+            break
+        print(f"   [{redacao_id}] Reparando {', '.join(pedir)}")
+        reparados += [c for c in pedir if c not in reparados]
+        validos.update(await reparador.reparar(
+            cliente, OLLAMA_MODEL, "uni", pedir, redacao_id,
+            sistema=system_prompt, prompt=prompt, resposta_original=resposta_bruta, validos=validos,
+            esquema=esquema_parcial(ESQUEMA_RESPOSTA, pedir) if USAR_SAIDA_ESTRUTURADA else None,
+            num_predict=sum(NUM_PREDICT_REPARO[c] for c in pedir),
+        ))
+        invalidos = [c for c in CAMPOS_RESPOSTA if c not in validos]
+    if "nota_final" in invalidos and all(k in validos for k in COMPETENCIAS):
+        validos["nota_final"] = sum(validos[k]["nota"] for k in COMPETENCIAS)
+        reparados.append("nota_final")
+        invalidos.remove("nota_final")
+    return invalidos, reparados
+
+def preparar_entrada(entrada):
     try:
-        return json.loads(match.group())
+        redacao_id = int(entrada.get("id", -1))
     except:
         return None
 
-async def avaliar_redacao(texto):
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": texto,
-        "system": system_prompt,
-        "temperature": 0.1,
-        "stream": True
+    try:
+        nota_antiga = int(float(entrada.get("nota", 0)))
+    except:
+        nota_antiga = 0
+
+    comps_antigas = entrada.get("competencias", [])
+    c_antigas = [0, 0, 0, 0, 0]
+    if isinstance(comps_antigas, list) and len(comps_antigas) >= 5:
+        for i in range(5):
+            try:
+                c_antigas[i] = int(float(comps_antigas[i].get("nota", 0)))
+            except:
+                pass
+
+    return {
+        "id": redacao_id,
+        "texto": entrada.get("texto", ""),
+        "tema": entrada.get("tema", ""),
+        "nota_antiga": nota_antiga,
+        "c_antigas": c_antigas,
     }
 
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        try:
-            resp = await client.post(OLLAMA_URL, json=payload)
-            return resp.json().get("response", "").strip()
-        except:
-            return None
+class EstrategiaUniAgente(Estrategia):
+    nome = "uni-agente"
+
+    def id_redacao(self, redacao):
+        return str(redacao["id"])
+
+    async def avaliar(self, cliente, redacao):
+        prompt = montar_prompt(redacao["texto"], redacao["id"])
+        resposta_bruta = await avaliar_redacao(cliente, prompt, redacao["id"])
+        if not resposta_bruta:
+            raise FalhaAvaliacao("sem resposta do modelo")
+
+        # Campos que chegaram completos valem mesmo com o JSON cortado; só o resto é pedido de novo
+        validos, invalidos = validar_campos(extrair_campos(resposta_bruta, CAMPOS_RESPOSTA), CAMPOS_RESPOSTA)
+        if not any(k in validos for k in COMPETENCIAS):
+            raise FalhaAvaliacao("JSON inválido")
+        invalidos, reparos = await reparar_avaliacao(cliente, prompt, resposta_bruta, validos, invalidos, redacao["id"])
+        if invalidos:
+            raise FalhaAvaliacao(f"campos inválidos após o reparo: {', '.join(invalidos)}")
+        avaliacao = {c: validos[c] for c in CAMPOS_RESPOSTA}
+        return {"avaliacao": avaliacao, "resposta_bruta": resposta_bruta, "reparos": reparos}
+
+    def montar_linha(self, redacao, resultado):
+        return montar_linha(redacao, resultado["avaliacao"])
+
+def montar_registro_json(redacao, resultado, tempo):
+    return {
+        "id": redacao["id"],
+        "nota_antiga": redacao["nota_antiga"],
+        "nota_nova": resultado["avaliacao"].get("nota_final", 0),
+        "avaliacao_llm": resultado["avaliacao"],
+        "resposta_bruta": resultado["resposta_bruta"],
+        "reparos": resultado["reparos"],
+        "tempo_avaliacao_s": round(tempo, 3)
+    }
+
+def montar_linha(redacao, resultado):
+    c_antigas = redacao["c_antigas"]
+    return {
+        "id": redacao["id"],
+        "nota_antiga": redacao["nota_antiga"],
+        "nota_nova": resultado.get("nota_final", 0),
+
+        "c1": resultado.get("competencia_1", {}).get("nota", 0),
+        "c2": resultado.get("competencia_2", {}).get("nota", 0),
+        "c3": resultado.get("competencia_3", {}).get("nota", 0),
+        "c4": resultado.get("competencia_4", {}).get("nota", 0),
+        "c5": resultado.get("competencia_5", {}).get("nota", 0),
+
+        "justificativa_c1": resultado.get("competencia_1", {}).get("justificativa", ""),
+        "justificativa_c2": resultado.get("competencia_2", {}).get("justificativa", ""),
+        "justificativa_c3": resultado.get("competencia_3", {}).get("justificativa", ""),
+        "justificativa_c4": resultado.get("competencia_4", {}).get("justificativa", ""),
+        "justificativa_c5": resultado.get("competencia_5", {}).get("justificativa", ""),
+
+        "diagnostico_geral": resultado.get("diagnostico_geral", ""),
+        "tema": redacao["tema"],
+
+        "c1_antiga": c_antigas[0],
+        "c2_antiga": c_antigas[1],
+        "c3_antiga": c_antigas[2],
+        "c4_antiga": c_antigas[3],
+        "c5_antiga": c_antigas[4]
+    }
 
 async def main():
     arquivo_temas = f"{PASTA_REDACOES}/todos_os_temas.json"
 
-    with open(arquivo_temas, "r", encoding="utf-8") as f:
-        lista_redacoes = json.load(f)
-
-    contador = 0
-
     colunas = [
         "id", "nota_antiga", "nota_nova",
         "c1", "c2", "c3", "c4", "c5",
@@ -87,100 +251,49 @@ async def main():
         "c1_antiga", "c2_antiga", "c3_antiga", "c4_antiga", "c5_antiga"
     ]
 
+    diario = DiarioExecucao(ARQUIVO_DIARIO, reiniciar=not RETOMAR)
+    if RETOMAR:
+        diario.incluir(ids_no_csv(CSV_SAIDA, "id"))
+        print(f"Retomando: {len(diario)} redações já concluídas")
+    novo_csv = not RETOMAR or not os.path.exists(CSV_SAIDA)
+
+    # Lidas em streaming conforme os workers ficam livres, sem carregar o arquivo inteiro
+    redacoes = (
+        redacao for redacao in map(preparar_entrada, iterar_redacoes_arquivo(arquivo_temas))
+        if redacao is not None
+    )
+
+    estrategia = EstrategiaUniAgente()
     print(f"Iniciando processamento. Saída: {CSV_SAIDA}")
 
-    with open(CSV_SAIDA, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=colunas)
-        writer.writeheader()
-
-        for bloco in lista_redacoes:
-            iteravel = bloco if isinstance(bloco, list) else [bloco]
-
-            for entrada in iteravel:
-                try:
-                    redacao_id = int(entrada.get("id", -1))
-                except:
-                    continue
-
-                texto = entrada.get("texto", "")
-                tema = entrada.get("tema", "")
-
-                try:
-                    nota_antiga = int(float(entrada.get("nota", 0)))
-                except:
-                    nota_antiga = 0
-
-                comps_antigas = entrada.get("competencias", [])
-                c_antigas = [0, 0, 0, 0, 0]
-                if isinstance(comps_antigas, list) and len(comps_antigas) >= 5:
-                    for i in range(5):
-                        try:
-                            c_antigas[i] = int(float(comps_antigas[i].get("nota", 0)))
-                        except:
-                            pass
-
-                MAX_TENTATIVAS = 2
-                resultado = None
-                resposta_bruta = ""
-
-                for tentativa in range(MAX_TENTATIVAS):
-                    print(f"Avaliando ID {redacao_id} (Tentativa {tentativa+1}/{MAX_TENTATIVAS})...")
-                    resposta_bruta = await avaliar_redacao(texto)
-
-                    if resposta_bruta:
-                        resultado = extrair_json(resposta_bruta)
-                        if resultado:
-                            break
-
-                    print(" -> Falha ou JSON inválido")
-                    await asyncio.sleep(1)
-
-                if resultado is None:
-                    print(f" -> ERRO: Falha ao avaliar ID {redacao_id}")
-                    continue
-
-                linha = {
-                    "id": redacao_id,
-                    "nota_antiga": nota_antiga,
-                    "nota_nova": resultado.get("nota_final", 0),
-
-                    "c1": resultado.get("competencia_1", {}).get("nota", 0),
-                    "c2": resultado.get("competencia_2", {}).get("nota", 0),
-                    "c3": resultado.get("competencia_3", {}).get("nota", 0),
-                    "c4": resultado.get("competencia_4", {}).get("nota", 0),
-                    "c5": resultado.get("competencia_5", {}).get("nota", 0),
-
-                    "justificativa_c1": resultado.get("competencia_1", {}).get("justificativa", ""),
-                    "justificativa_c2": resultado.get("competencia_2", {}).get("justificativa", ""),
-                    "justificativa_c3": resultado.get("competencia_3", {}).get("justificativa", ""),
-                    "justificativa_c4": resultado.get("competencia_4", {}).get("justificativa", ""),
-                    "justificativa_c5": resultado.get("competencia_5", {}).get("justificativa", ""),
-
-                    "diagnostico_geral": resultado.get("diagnostico_geral", ""),
-                    "tema": tema,
-
-                    "c1_antiga": c_antigas[0],
-                    "c2_antiga": c_antigas[1],
-                    "c3_antiga": c_antigas[2],
-                    "c4_antiga": c_antigas[3],
-                    "c5_antiga": c_antigas[4]
-                }
-
-                writer.writerow(linha)
-                csvfile.flush()
-
-                with open(f"{PASTA_RESULTADOS}/{redacao_id}.json", "w", encoding="utf-8") as f:
-                    json.dump({
-                        "id": redacao_id,
-                        "nota_antiga": nota_antiga,
-                        "nota_nova": resultado.get("nota_final", 0),
-                        "avaliacao_llm": resultado,
-                        "resposta_bruta": resposta_bruta
-                    }, f, ensure_ascii=False, indent=2)
-
-                contador += 1
-
-    print(f"({contador} redações processadas)")
+    metricas = MetricasChamadas(ARQUIVO_METRICAS)
+    async with criar_cliente(metricas) as cliente:
+        # As avaliações terminam fora de ordem; as linhas são escritas na ordem do arquivo
+        # O CSV fica por último: ao retomar, um ID presente nele já está nos outros destinos
+        destinos = [DestinoJSONL(JSONL_SAIDA, montar_registro_json, sobrescrever=novo_csv)]
+        if PARQUET_SAIDA and PARQUET_DISPONIVEL:
+            destinos.append(DestinoParquet(PARQUET_SAIDA, sobrescrever=novo_csv))
+        elif PARQUET_SAIDA:
+            print("pyarrow não instalado: Parquet desativado")
+        destinos.append(DestinoCSV(CSV_SAIDA, colunas, sobrescrever=novo_csv))
+        motor = MotorAvaliacao(
+            estrategia, cliente, destinos, AgendadorPorRedacao(NUM_WORKERS), diario,
+            max_tentativas=MAX_TENTATIVAS, espera_base=ESPERA_BASE, espera_maxima=ESPERA_MAXIMA,
+            linhas_por_checkpoint=LINHAS_POR_CHECKPOINT, intervalo_checkpoint=INTERVALO_CHECKPOINT
+        )
+        try:
+            await motor.executar(redacoes)
+        finally:
+            motor.fechar()
+            metricas.fechar()
+
+        print(cliente.resumo())
+
+    print(f"({motor.concluidas} redações processadas)")
+    print(motor.resumo())
+    print(metricas.resumo())
+    print(construtor_prompt.resumo())
+    print(reparador.resumo())
 
 if __name__ == "__main__":
     asyncio.run(main())